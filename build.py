@@ -1,20 +1,44 @@
 # build.py — SiteSmith Orchestrator (Magazine: hero, category sections, TOC, JSON-LD)
 from pathlib import Path
-import argparse, json
+from itertools import islice
+import argparse, json, sys
+from urllib.parse import urlparse
 
-from ssg.content import load_keywords, call_openai
+from ssg.content import iter_keywords, unique_keywords, MAX_REPORTED
+from ssg.generate import generate, env_api_key
+from ssg.store import PostStore
 from ssg.themes import choose_theme
+from ssg.manifest import BuildManifest
+from ssg.parallel import make_pool, write_posts, build_taxonomy_pages
+from ssg.siteindex import SiteIndex
+from ssg.postmeta import PostMeta, slim_record
+from ssg.linker import Linker, use_linker
+from ssg.related import related_posts
+from ssg.images import build_derivatives, use_derivatives
+from ssg.assets import build_assets
+from ssg.finalize import finalize
+from ssg.markdown_posts import load_markdown_posts, payload_for
+from ssg import output, profile
+from ssg.profile import phase
+from ssg.shard import parse_shard, shard_of, default_partial, write_partial
 from ssg.render import (
-    prepare_dirs, analytics_snippet, write_post, write_standard_pages,
-    build_category_pages, build_tag_pages, rebuild_index,
+    prepare_dirs, analytics_snippet, write_standard_pages,
+    rebuild_index,
     write_sitemap_and_robots, write_search_index, slugify,
-    write_feed, write_404, write_archive_pages
+    write_feed, write_404, write_archive_pages, post_record, load_image_map, patch_related
 )
 
-def main():
+ROOT = Path(__file__).resolve().parent
+PAYLOAD_BATCH = 2000    # re-rendered posts whose stored payloads are in memory at once
+
+def base_prefix_for(site_url: str) -> str:
+    """URL path the site lives under: "/REPO" for project pages, "" for user pages and custom domains."""
+    return urlparse(site_url).path.rstrip("/")
+
+def parser(site_url_required=True) -> argparse.ArgumentParser:
     ap = argparse.ArgumentParser(description="Generate static blog.")
     ap.add_argument("--brand", default="My Test Blog")
-    ap.add_argument("--site_url", required=True, help="https://USERNAME.github.io/REPO")
+    ap.add_argument("--site_url", required=site_url_required, help="https://USERNAME.github.io/REPO")
     ap.add_argument("--amazon_tag", default="yourtag-20")
     ap.add_argument("--keywords_file", default="data/keywords.json")
     ap.add_argument("--limit", type=int, default=9)
@@ -26,73 +50,315 @@ def main():
     ap.add_argument("--author_name", default="Staff Writer")
     ap.add_argument("--author_url", default="")
     ap.add_argument("--author_bio", default="We test products and write simple, trustworthy guides.")
-    args = ap.parse_args()
+    ap.add_argument("--full", action="store_true", help="Ignore the build manifest and re-render every page")
+    ap.add_argument("--gen_concurrency", type=int, default=8, help="Max in-flight generation requests")
+    ap.add_argument("--gen_rate", type=float, default=3.0, help="Generation requests per second (token bucket)")
+    ap.add_argument("--cache_ttl_days", type=float, default=30, help="Days a cached generation response stays valid")
+    ap.add_argument("--jobs", type=int, default=1, help="Worker processes for post/taxonomy rendering (0 = all cores)")
+    ap.add_argument("--finalize", action="store_true", help="Minify HTML/XML/JSON output and write .gz/.br siblings")
+    ap.add_argument("--profile", nargs="?", const=".cache/profile", metavar="DIR",
+                    help="Time every build phase and page type; writes DIR/summary.json + DIR/trace.json (Perfetto)")
+    ap.add_argument("--profile_no_memory", action="store_true", help="With --profile: skip tracemalloc (lower overhead, no peak memory)")
+    ap.add_argument("--shard", type=parse_shard, metavar="K/N",
+                    help="Generate and render only shard K of N (by slug hash) and write a partial for python -m ssg merge")
+    ap.add_argument("--store", default="data/posts.db", help="SQLite store of generated posts")
+    ap.add_argument("--shard_out", help="Partial metadata file for --shard (default .cache/shards/shard-K-of-N.json)")
+    return ap
 
-    # base_prefix for repos served at /REPO
-    base_prefix = "/" + args.site_url.rstrip("/").split("github.io/")[-1]
-    if base_prefix == "/": base_prefix = ""
+def site_config(args, base_prefix, theme_key, analytics_html) -> dict:
+    """Options every page depends on: a change forces a full rebuild, and all shards of a build must agree on them."""
+    return {"brand": args.brand, "site_url": args.site_url, "base_prefix": base_prefix, "amazon_tag": args.amazon_tag,
+            "theme": theme_key, "analytics": analytics_html, "audience": args.audience, "domain": args.domain}
 
-    ROOT = Path(__file__).parent
+def build(args, warm=None):
+    """
+    One build into output.site_dir(). warm: a dict the dev server keeps between
+    rebuilds (the open post store); None for one-shot builds.
+    Returns the BuildManifest, whose .dirty/.full describe what was rebuilt.
+    """
+
+    base_prefix = base_prefix_for(args.site_url)
+    if args.profile: profile.start(memory=not args.profile_no_memory)
+
+    output.reset()
     SITE, POSTS, DATA = prepare_dirs(ROOT)
+    # Fingerprinted JS/CSS from static/ (before any page renders: templates embed the hashed names)
+    with phase("assets"): build_assets()
 
     theme_key, theme = choose_theme(args.force_theme)
     print("🎨 Theme:", theme_key)
 
     analytics_html = analytics_snippet(args.analytics)
 
-    keywords = load_keywords(ROOT / args.keywords_file)
-    if not keywords:
-        (ROOT / args.keywords_file).write_text(json.dumps({"keywords": ["sample post"]}, indent=2), encoding="utf-8")
-        keywords = []
-
-    picked = keywords[: max(0, args.limit)]
     posts_meta, collected = [], []
+    author = {"author_name": args.author_name, "author_url": args.author_url, "author_bio": args.author_bio}
+    # Hand-written content/posts/*.md first (oldest first); front matter only, bodies convert at render time
+    with phase("markdown"): entries = load_markdown_posts()
+    md_owner = {}                             # slug -> first Markdown file; later files with that slug are skipped
+    for entry in entries:
+        payload = dict(payload_for(entry, slugify), **author)
+        first = md_owner.setdefault(payload["slug"], entry["path"])
+        if first != entry["path"]:
+            print(f"⚠ {entry['path']} skipped: /posts/{payload['slug']}/ already belongs to {first}"); continue
+        collected.append(payload)
+        posts_meta.append(PostMeta.of(payload))
+
+    # Keywords (.json / .jsonl / .csv) stream in deduped by slug; reading stops after --limit posts
+    keywords_path = ROOT / args.keywords_file
+    kw_stats = {}
+    with phase("keywords"):
+        unique = unique_keywords(iter_keywords(keywords_path), slugify, taken=[p["slug"] for p in collected], stats=kw_stats)
+        picked = list(islice(unique, max(0, args.limit)))
+    if not keywords_path.exists():
+        keywords_path.write_text(json.dumps({"keywords": ["sample post"]}, indent=2), encoding="utf-8")
+    if kw_stats["duplicates"] or kw_stats["collisions"]:
+        print("🔑 Keywords: {duplicates} duplicate(s) dropped, {collisions} slug collision(s) skipped".format(**kw_stats))
 
-    # 1) Collect AI outputs (structured JSON)
-    for kw in picked:
-        data = call_openai(kw)
-        slug = slugify(kw)
-        category = data.get("category", "General")
-        tags = data.get("tags", [])
-        title = data.get("title") or kw.title()
+    # --shard K/N: every runner sees the same deduped post list and keeps the slugs that hash to shard K
+    order = {slug: i for i, slug in enumerate([p["slug"] for p in collected] + [slug for _, slug in picked])}
+    # Auto-link phrases: every keyword and Markdown title, before sharding so links may cross shards
+    link_targets = picked + [(m.title, m.slug) for m in posts_meta]
+    if args.shard:
+        k, n = args.shard
+        mine = lambda slug: shard_of(slug, n) == k
+        collected = [p for p in collected if mine(p["slug"])]; posts_meta = [m for m in posts_meta if mine(m["slug"])]
+        picked = [(kw, slug) for kw, slug in picked if mine(slug)]
+        print(f"🧩 Shard {k}/{n}: {len(collected) + len(picked)} of {len(order)} posts")
 
+    # 1) Posts live in the store (data/posts.db); only keywords it lacks are generated — concurrent, rate-limited, cached.
+    # Stub rows (stored while there was no API key) count as missing once there is one
+    store = (warm or {}).get("store") or PostStore(ROOT/args.store)
+    if warm is not None: warm["store"] = store
+    keywords, slugs = [kw for kw, _ in picked], dict(picked)
+    live = bool(env_api_key())
+    have = store.known(keywords, stubs=not live)
+    missing = [kw for kw in keywords if kw not in have]
+    memo = warm.get("generated", {}) if warm is not None else {}     # results handed in (benchmarks)
+    fresh = {kw: memo[kw] for kw in missing if kw in memo}
+    sources = dict.fromkeys(fresh, "model")
+    gen_stats = {"requested": 0, "cached": 0}
+    todo = [kw for kw in missing if kw not in fresh]
+    if todo:
+        with phase("generate"):
+            generated, gen_stats = generate(todo, ROOT/".cache"/"generation", concurrency=args.gen_concurrency,
+                                            rate=args.gen_rate, ttl_days=args.cache_ttl_days)
+        fresh.update(generated); sources.update(dict.fromkeys(generated, "model" if live else "stub"))
+    if gen_stats["requested"] or gen_stats["cached"] or gen_stats.get("failed"):
+        print("🤖 Generation: {requested} requested, {cached} cached, {retries} retries, {evicted} evicted, {failed} failed".format(**gen_stats))
+    for kw, err in list(gen_stats.get("errors", {}).items())[:MAX_REPORTED]: print(f"  ⚠ {kw}: {err}")
+    entries = []
+    for kw, data in fresh.items():
+        title, category, tags = data.get("title") or kw.title(), data.get("category", "General"), data.get("tags", [])
+        record = post_record({"slug": slugs[kw], "title": title, "category": category, "tags": tags, "data": data})
+        del record["published"]
+        entries.append((kw, slugs[kw], title, category, tags, data, record, sources[kw]))
+    # Markdown posts (all of collected so far) are stored too, keyed by path, so listings can query every post
+    for p in collected:
+        record = post_record(p); del record["published"]
+        entries.append((p["source"]["path"], p["slug"], p["title"], p["category"], p["tags"],
+                        {k: v for k, v in p.items() if k not in author}, record, "markdown"))
+    if entries:
+        with phase("store"): store.put(entries)
+    # Listing fields only, straight into PostMeta (title/category/tags live there alone); payloads are
+    # loaded in batches for the posts that get re-rendered
+    with phase("store"): stored = store.rows(keywords)
+    # Keywords whose generation failed (and that have no earlier row) sit this build out; the next one retries them
+    lost = {slugs[kw] for kw in keywords if kw not in stored}
+    if lost:
+        print(f"⚠ {len(lost)} post(s) left out of this build: generation failed")
+        picked = [(kw, slug) for kw, slug in picked if slug not in lost]
+        link_targets = [(phrase, slug) for phrase, slug in link_targets if slug not in lost]
+        for slug in lost: del order[slug]
+    for kw, slug in picked:
+        row = stored[kw]
         payload = {
             "keyword": kw,
-            "data": data,
+            "hash": row["hash"],
             "slug": slug,
-            "category": category,
-            "tags": tags,
-            "title": title,
-            "author_name": args.author_name,
-            "author_url": args.author_url,
-            "author_bio": args.author_bio,
+            "date": row["published"],
+            **author,
         }
         collected.append(payload)
-        posts_meta.append({"slug": slug, "title": title, "category": category, "tags": tags})
+        posts_meta.append(PostMeta(slug, row.pop("title"), row.pop("category"), row.pop("tags")))
+
+    # Incremental builds: anything in here changes every page, so a change forces a full rebuild
+    config = site_config(args, base_prefix, theme_key, analytics_html)
+    manifest = BuildManifest(output.state_path("build-manifest.json"), dict(config, shard=args.shard) if args.shard else config,
+                             force=args.full)
+
+    # One automaton over all link phrases; pool workers receive it once, through their initializer
+    with phase("linker"): linker = Linker(link_targets + [(m.title, m.slug) for m in posts_meta])
+    use_linker(linker)
+    pool = make_pool(args.jobs, linker)
+    # Responsive image derivatives (only new/changed sources are encoded)
+    with phase("images"): images = build_derivatives([p["slug"] for p in collected], load_image_map(), pool)
+
+    # 2) Render posts (pass top-5 similar posts for internal links) — only those whose inputs changed
+    with phase("related"): neighbours = related_posts(posts_meta, k=5)
+    tasks, records, settled = [], {}, {}
+    with phase("manifest"):
+        for payload, meta, near in zip(collected, posts_meta, neighbours):
+            related = [posts_meta[j] for j in near]
+            image = images.get(payload["slug"])
+            # Stored posts take the earlier of the store's and the manifest's first-published date, so either
+            # one being reset (a fresh CI store, a cleared .cache) does not re-date them
+            known = manifest.known.get(payload["slug"], {}).get("published")
+            if payload.get("keyword") and known: payload = dict(payload, date=min(payload["date"], known))
+            # Listings sort by date, so it is part of what they show of a post
+            changed = manifest.post_changed(payload["slug"], [related, image], meta, POSTS/payload["slug"]/"index.html",
+                                            content=payload, listing=[meta, image, payload.get("date")], alive=order,
+                                            published=payload.get("date"))
+            # Persisted dates: a post without one keeps the day it first appeared; updated moves with its content.
+            # The store takes the same dates, so its date-ordered listing queries match the pages
+            dates = manifest.posts[payload["slug"]]
+            payload = dict(payload, date=dates["published"], updated=dates["updated"])
+            settled[payload.get("keyword") or payload["source"]["path"]] = (dates["published"], dates["updated"])
+            if changed:
+                tasks.append((payload, meta, related))
+            elif "data" in payload:
+                records[payload["slug"]] = slim_record(post_record(payload))
+            else:
+                records[payload["slug"]] = dict(slim_record(stored.pop(payload["keyword"])["record"]), published=payload["date"])
+    with phase("store"): store.set_dates(settled)
+    # write_post hands back each post's structured record for the search index + feed
+    with phase("write_post"):
+        for i in range(0, len(tasks), PAYLOAD_BATCH):
+            batch = tasks[i:i + PAYLOAD_BATCH]
+            need = [p["keyword"] for p, _, _ in batch if "data" not in p]
+            data = store.payloads(need) if need else {}
+            batch = [(p if "data" in p else dict(p, **meta.as_dict(), data=data.pop(p["keyword"])), related)
+                     for p, meta, related in batch]
+            for rec in write_posts(pool, args.brand, args.site_url, base_prefix, batch, args.amazon_tag, theme, analytics_html):
+                manifest.note_links(rec["slug"], rec.pop("links", []))
+                records[rec["slug"]] = slim_record(rec)
+                manifest.note_record(rec["slug"], [rec["summary"], rec["headings"]])
+                print("✔ Wrote post:", rec["slug"])
+
+    if args.shard:
+        # Global pages come from python -m ssg merge; nothing is pruned (other shards' output may share the dir)
+        path = Path(args.shard_out) if args.shard_out else default_partial(args.shard)
+        lastmod = manifest.lastmod()
+        write_partial(path, args.shard, config, [
+            {"order": order[m.slug], "meta": m.as_dict(), "record": records[m.slug], "lastmod": lastmod.get(m.slug),
+             "image": images.get(m.slug)} for m in posts_meta], output.emitted())
+        if pool: pool.shutdown()
+        if warm is None: store.close()
+        with phase("save"): output.save(); manifest.save()
+        print(f"✅ Shard {args.shard[0]}/{args.shard[1]} built ({len(manifest.dirty)}/{len(collected)} posts re-rendered) → {path}")
+        if args.profile: profile.finish(ROOT/args.profile)
+        return manifest
 
-    # 2) Render posts (pass small related list for internal links)
-    for payload in collected:
-        related = [m for m in posts_meta if m["slug"] != payload["slug"]][:5]
-        write_post(args.brand, args.site_url, base_prefix, payload, args.amazon_tag, theme, related, analytics_html)
-        print("✔ Wrote post:", payload["slug"])
+    desc = "Latest articles: " + ", ".join([m.title for m in posts_meta]) if posts_meta else f"{args.brand} blog"
+    # Categories, tags and recency come from the store's indexed queries over this build's posts
+    with phase("store"):
+        store.scope(settled)
+        site_index = SiteIndex(posts_meta, store=store)
+    removed = write_listings(args, base_prefix, theme, analytics_html, site_index, records, manifest,
+                             manifest.lastmod(), desc, pool)
+    if pool: pool.shutdown()
+    if warm is None: store.close()
+    with phase("save"): output.save(); manifest.save()
+    print(f"🧹 Output: {output.stats['written']} written, {output.stats['unchanged']} unchanged, {len(removed)} stale removed")
 
-    # 3) Standard pages + category/tag pages + archives
-    write_standard_pages(args.brand, args.site_url, base_prefix, theme, analytics_html,
-                         audience=args.audience, domain=args.domain)
+    print(f"✅ Site built successfully ({len(manifest.dirty)}/{len(collected)} posts re-rendered).")
+    if args.profile: profile.finish(ROOT/args.profile)
+    return manifest
+
+def write_listings(args, base_prefix, theme, analytics_html, site_index, records, manifest, lastmod, desc, pool):
+    """
+    Everything that lists posts (shared by build and merge), then pruning and
+    --finalize. manifest says which pages are stale. Returns the pruned paths.
+    """
+    SITE, POSTS = output.site_dir(), output.site_dir()/"posts"
+    posts_meta = site_index.posts
+
+    # 3) Standard pages + category/tag pages + archives (all listings read one shared SiteIndex)
+    if manifest.full:
+        with phase("standard_pages"):
+            write_standard_pages(args.brand, args.site_url, base_prefix, theme, analytics_html,
+                                 audience=args.audience, domain=args.domain)
     if posts_meta:
-        build_category_pages(args.brand, args.site_url, base_prefix, theme, posts_meta, analytics_html)
-        build_tag_pages(args.brand, args.site_url, base_prefix, theme, posts_meta, analytics_html)
-        write_archive_pages(args.brand, args.site_url, base_prefix, theme, posts_meta, analytics_html)
+        only_cats = None if manifest.full else manifest.dirty_terms("category")
+        only_tags = None if manifest.full else manifest.dirty_terms("tag")
+        with phase("category_pages"):
+            build_taxonomy_pages(pool, "category", args.brand, args.site_url, base_prefix, theme, site_index, analytics_html, only=only_cats)
+        with phase("tag_pages"):
+            build_taxonomy_pages(pool, "tag", args.brand, args.site_url, base_prefix, theme, site_index, analytics_html, only=only_tags)
+        # Term pages no post feeds any more (full builds find them by walking site/)
+        for kind, current in (("category", site_index.category_slugs), ("tag", site_index.tag_slugs)):
+            for term_slug in manifest.dirty_terms(kind) - set(current.values()): output.owns(SITE/kind/term_slug)
+        if manifest.listings_changed:
+            with phase("archive"): write_archive_pages(args.brand, args.site_url, base_prefix, theme, site_index, analytics_html)
 
     # 4) Homepage (with hero + category sections + pagination) + sitemap + search index + feed + 404
-    desc = f"Latest articles: " + ", ".join([c['title'] for c in collected]) if collected else f"{args.brand} blog"
-    rebuild_index(args.brand, desc, args.site_url, base_prefix, theme, posts_meta, analytics_html)
-    write_sitemap_and_robots(args.site_url, posts_meta)
-    write_search_index(posts_meta)
-    write_feed(args.brand, args.site_url, posts_meta)
-    write_404(args.brand, args.site_url, base_prefix, theme, analytics_html)
-
-    print("✅ Site built successfully.")
+    if manifest.listings_changed:
+        with phase("rebuild_index"): rebuild_index(args.brand, desc, args.site_url, base_prefix, theme, site_index, analytics_html)
+    if manifest.records_changed:
+        with phase("sitemap"): write_sitemap_and_robots(args.site_url, site_index, lastmod=lastmod)
+        with phase("feed"): write_feed(args.brand, args.site_url, site_index, records, lastmod=lastmod)
+    if manifest.search_changed:
+        with phase("search"): write_search_index(site_index, records)
+    if manifest.full:
+        with phase("404"): write_404(args.brand, args.site_url, base_prefix, theme, analytics_html)
+    for slug in manifest.removed: output.owns(POSTS/slug)
+
+    # 5) Drop stale output, then optionally minify + precompress whatever changed
+    with phase("prune"): removed = output.prune(full=manifest.full)
+    if args.finalize:
+        with phase("finalize"): finalize(SITE, pool)
+    return removed
+
+def merge(args, merged):
+    """
+    Global pages of a sharded build (python -m ssg merge): every listing,
+    sitemap, search index and feed, from the shards' combined partials
+    (ssg.shard.load_partials). Each shard's site dir must be copied into this
+    one first; their files are kept, anything else stale is pruned.
+    """
+    base_prefix = base_prefix_for(args.site_url)
+    if args.profile: profile.start(memory=not args.profile_no_memory)
+
+    output.reset()
+    SITE, POSTS, DATA = prepare_dirs(ROOT)
+    with phase("assets"): build_assets()
+    theme_key, theme = choose_theme(args.force_theme)
+    analytics_html = analytics_snippet(args.analytics)
+    config = site_config(args, base_prefix, theme_key, analytics_html)
+    if config != merged["config"]:
+        sys.exit("✖ merge: site options differ from the ones the shards were built with")
+
+    posts = merged["posts"]
+    missing = [r for r in merged["files"] if not (SITE/r).is_file()]
+    if missing:
+        sys.exit(f"✖ merge: {len(missing)} shard output file(s) missing from {SITE} (e.g. {missing[0]}); copy every shard's site dir in first")
+    output.keep(*(SITE/r for r in merged["files"]))
+    use_derivatives({p["meta"]["slug"]: p["image"] for p in posts if p["image"]})
+
+    posts_meta = [PostMeta.of(p.pop("meta")) for p in posts]
+    records = {m.slug: p["record"] for m, p in zip(posts_meta, posts)}
+    lastmod = {m.slug: p["lastmod"] for m, p in zip(posts_meta, posts)}
+    desc = "Latest articles: " + ", ".join([m.title for m in posts_meta]) if posts_meta else f"{args.brand} blog"
+    # Each shard only saw its own posts: related lists over all of them (in build order, as an unsharded build
+    # computes them) replace the ones in the shards' post pages wherever they differ
+    with phase("related"):
+        neighbours = related_posts(posts_meta, k=5)
+        patched = sum(patch_related(POSTS/m.slug/"index.html", base_prefix, [posts_meta[j] for j in near])
+                      for m, near in zip(posts_meta, neighbours))
+    print(f"🔗 Related posts: {patched} post page(s) updated")
+    # A fresh forced manifest: every global page is rebuilt, none of the shards' posts are
+    manifest = BuildManifest(output.state_path("build-manifest.json"), config, force=True)
+    pool = make_pool(args.jobs)
+    # No store here: the shards' published dates give the same order a single build's store queries do
+    site_index = SiteIndex(posts_meta, published={slug: r["published"] for slug, r in records.items()})
+    removed = write_listings(args, base_prefix, theme, analytics_html, site_index, records, manifest, lastmod, desc, pool)
+    if pool: pool.shutdown()
+    with phase("save"): output.save()
+    print(f"🧹 Output: {output.stats['written']} written, {output.stats['unchanged']} unchanged, {len(removed)} stale removed")
+    print(f"✅ Merged {len(posts)} posts from the shard partials.")
+    if args.profile: profile.finish(ROOT/args.profile)
+
+def main():
+    build(parser().parse_args())
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,23 @@
+# ssg/__main__.py — command line: python -m ssg serve [--watch] [build options] | merge | bench
+import sys
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    cmd, rest = (argv[0], argv[1:]) if argv else ("", [])
+    if cmd == "serve":
+        from .serve import serve
+        return serve(rest)
+    if cmd == "merge":
+        from .shard import main as merge
+        return merge(rest)
+    if cmd == "bench":
+        from .bench import main as bench
+        return bench(rest)
+    print("usage: python -m ssg serve [--watch] [--port N] [build.py options]\n"
+          "       python -m ssg merge PARTIAL... --site_url ... [build.py options]\n"
+          "       python -m ssg bench [--sizes 1000,10000,100000] [--jobs N] [--save-baseline]\n"
+          "       (one-shot builds: python build.py --site_url ...)")
+    return 2
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+# ssg/assets.py — fingerprinted static assets: static/** -> site/assets/<name>.<hash>.<ext> + manifest.json
+import json, hashlib
+from pathlib import Path
+from . import output
+from .styles import styles, SHEET
+
+ROOT = Path(__file__).resolve().parents[1]
+STATIC_DIR = ROOT/"static"
+HASH_LEN = 10
+
+def fingerprint(rel: str, blob: bytes) -> str:
+    """js/search.js -> js/search.<sha256[:10]>.js"""
+    stem, dot, ext = rel.rpartition(".")
+    return f"{stem}.{hashlib.sha256(blob).hexdigest()[:HASH_LEN]}{dot}{ext}"
+
+def build_assets(static_dir: Path = STATIC_DIR, out_dir: Path = None) -> dict:
+    """
+    Copy every file under static/ to its content-hashed name (unchanged files
+    keep their name, so browsers can cache them forever) and write the
+    {logical name: hashed name} manifest. The output layer prunes superseded
+    fingerprints.
+    """
+    global _MANIFEST
+    out_dir = Path(out_dir or output.site_dir()/"assets")
+    manifest = {}
+    for src in sorted(p for p in static_dir.rglob("*") if p.is_file()):
+        rel = src.relative_to(static_dir).as_posix(); blob = src.read_bytes()
+        name = manifest[rel] = fingerprint(rel, blob)
+        output.write(out_dir/name, blob)
+    # Bulma purged to the classes the site uses (ssg/styles.py); pages inline its critical part
+    blob = styles()["sheet"].encode("utf-8")
+    name = manifest[SHEET] = fingerprint(SHEET, blob)
+    output.write(out_dir/name, blob)
+    for top in {rel.split("/")[0] for rel in manifest if "/" in rel}: output.owns(out_dir/top)
+    output.write(out_dir/"manifest.json", json.dumps(manifest, indent=2, sort_keys=True))
+    _MANIFEST = manifest
+    return manifest
+
+def _load(path: Path) -> dict:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        return data if isinstance(data, dict) else {}
+    except Exception:
+        return {}
+
+_MANIFEST = None
+def asset(rel: str) -> str:
+    """Site-relative URL of a static asset (prefix with base_prefix): /assets/js/search.<hash>.js"""
+    global _MANIFEST
+    if _MANIFEST is None: _MANIFEST = _load(output.site_dir()/"assets"/"manifest.json")
+    return f"/assets/{_MANIFEST.get(rel, rel)}"
@@ -0,0 +1,222 @@
+# ssg/bench.py — synthetic-corpus benchmarks (python -m ssg bench): render.py functions + end-to-end build vs a stored baseline
+import sys, json, time, random, shutil, argparse, platform, subprocess, tempfile, contextlib
+from pathlib import Path
+from . import output
+from .content import _stub_post
+
+try:
+    import resource     # peak RSS; Unix only
+except ImportError:
+    resource = None
+
+ROOT = Path(__file__).resolve().parents[1]
+BASELINE = ROOT/"data"/"bench-baseline.json"
+RESULTS = ROOT/".cache"/"bench"/"results.json"
+SIZES = (1_000, 10_000, 100_000)
+TOLERANCE = 0.25        # fail when a metric is this much worse than the baseline
+MIN_SECONDS = 0.05      # timings shorter than this are too noisy to compare
+SAMPLE_POSTS = 500      # write_post is timed on this many posts (the end-to-end build renders them all)
+
+ADJECTIVES = ["best", "cheap", "quiet", "portable", "compact", "wireless", "smart", "heavy duty", "budget", "premium",
+              "lightweight", "waterproof", "cordless", "electric", "manual", "foldable", "ergonomic", "rechargeable"]
+NOUNS = ["air fryer", "blender", "standing desk", "office chair", "espresso machine", "robot vacuum", "air purifier",
+         "headphones", "monitor", "keyboard", "mouse", "backpack", "tent", "sleeping bag", "water filter", "drill",
+         "pressure washer", "lawn mower", "space heater", "humidifier", "rice cooker", "kettle", "toaster", "router",
+         "webcam", "microphone", "ring light", "treadmill", "yoga mat", "dumbbells", "bike lock", "dash cam"]
+USES = ["for small apartments", "for beginners", "for travel", "for home office", "for gaming", "for kids",
+        "for seniors", "for camping", "under 100", "under 50", "for pets", "for streaming", "for students", ""]
+CATEGORIES = ["Kitchen", "Home Office", "Outdoors", "Fitness", "Electronics", "Audio", "Tools", "Garden", "Travel",
+              "Smart Home", "Cleaning", "Baby", "Pets", "Automotive", "Photography", "Gaming", "Health", "Beauty",
+              "Sewing", "Music", "Books", "Storage", "Lighting", "Security"]
+
+def _zipf(n: int, s: float = 1.0) -> list:
+    """Cumulative weights of a Zipf(s) distribution over n ranks (a few terms dominate, a long tail)."""
+    out, acc = [], 0.0
+    for i in range(n):
+        acc += 1.0 / (i + 1) ** s; out.append(acc)
+    return out
+
+def corpus(n: int, seed: int = 0) -> dict:
+    """
+    n deterministic {keyword: content dict} entries built from _stub_post, with
+    Zipf-distributed categories and 2–5 tags from a vocabulary that grows with n.
+    """
+    rng = random.Random(seed)
+    vocab = [f"{a} {b}".strip() for b in NOUNS for a in ("", *ADJECTIVES)][:max(50, n // 25)]
+    vocab += [f"topic {i}" for i in range(len(vocab), max(50, n // 25))]
+    cat_w, tag_w = _zipf(len(CATEGORIES)), _zipf(len(vocab), 1.1)
+    out = {}
+    for i in range(n):
+        kw = " ".join(w for w in (rng.choice(ADJECTIVES), rng.choice(NOUNS), rng.choice(USES)) if w) + f" {i}"
+        data = _stub_post(kw)
+        data["category"] = rng.choices(CATEGORIES, cum_weights=cat_w)[0]
+        data["tags"] = sorted(set(rng.choices(vocab, cum_weights=tag_w, k=rng.randint(2, 5))))
+        out[kw] = data
+    return out
+
+def peak_rss() -> int | None:
+    """Peak resident set size in bytes of this process and its (pool worker) children."""
+    if resource is None: return None
+    scale = 1 if sys.platform == "darwin" else 1024     # ru_maxrss: bytes on macOS, KiB elsewhere
+    return max(resource.getrusage(w).ru_maxrss for w in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN)) * scale
+
+def _timed(results: dict, name: str, fn, *args, **kw):
+    """Run fn once and record seconds, pages written and bytes written under results[name]."""
+    pages0, bytes0 = output.stats["written"] + output.stats["unchanged"], output.stats["bytes"]
+    t0 = time.perf_counter(); value = fn(*args, **kw); dt = time.perf_counter() - t0
+    s = results.setdefault(name, {"calls": 0, "seconds": 0.0, "pages": 0, "bytes": 0})
+    s["calls"] += 1; s["seconds"] += dt
+    s["pages"] += output.stats["written"] + output.stats["unchanged"] - pages0; s["bytes"] += output.stats["bytes"] - bytes0
+    return value
+
+def bench_functions(generated: dict, site: Path) -> dict:
+    """Time each public page writer in ssg/render.py (plus post_record/slugify) over the corpus."""
+    from .render import (slugify, post_record, write_post, rebuild_index, write_sitemap_and_robots, build_category_pages,
+                         build_tag_pages, write_search_index, write_feed, write_404, write_standard_pages, write_archive_pages)
+    from .siteindex import SiteIndex
+    from .postmeta import PostMeta
+    from .linker import Linker, use_linker
+    from .assets import build_assets
+    from .themes import THEMES
+    output.set_site_dir(site); output.reset(); build_assets()
+    brand, site_url, base_prefix, theme, analytics = "Bench Blog", "https://bench.github.io/site", "/site", THEMES["bulma"], ""
+    fns, payloads = {}, []
+    for kw, data in generated.items():
+        slug = _timed(fns, "slugify", slugify, kw)
+        payloads.append({"keyword": kw, "data": data, "slug": slug, "category": data["category"], "tags": data["tags"],
+                         "title": data["title"], "author_name": "Bench", "author_url": "", "author_bio": ""})
+    posts_meta = [PostMeta.of(p) for p in payloads]
+    records = {p["slug"]: _timed(fns, "post_record", post_record, p) for p in payloads}
+    # Posts render with related lists and auto-links on, as in a real build
+    use_linker(Linker((p["keyword"], p["slug"]) for p in payloads))
+    for i, p in enumerate(payloads[:SAMPLE_POSTS]):
+        _timed(fns, "write_post", write_post, brand, site_url, base_prefix, p, "bench-20", theme, posts_meta[i + 1:i + 6], analytics)
+    use_linker(None)
+    index = SiteIndex(posts_meta)
+    _timed(fns, "write_standard_pages", write_standard_pages, brand, site_url, base_prefix, theme, analytics)
+    _timed(fns, "build_category_pages", build_category_pages, brand, site_url, base_prefix, theme, index, analytics)
+    _timed(fns, "build_tag_pages", build_tag_pages, brand, site_url, base_prefix, theme, index, analytics)
+    _timed(fns, "write_archive_pages", write_archive_pages, brand, site_url, base_prefix, theme, index, analytics)
+    _timed(fns, "rebuild_index", rebuild_index, brand, "Bench corpus", site_url, base_prefix, theme, index, analytics)
+    _timed(fns, "write_sitemap_and_robots", write_sitemap_and_robots, site_url, index)
+    _timed(fns, "write_feed", write_feed, brand, site_url, index, records)
+    _timed(fns, "write_search_index", write_search_index, index, records)
+    _timed(fns, "write_404", write_404, brand, site_url, base_prefix, theme, analytics)
+    for s in fns.values():
+        s["seconds"] = round(s["seconds"], 4)
+        s["per_s"] = round((s["pages"] or s["calls"]) / s["seconds"], 1) if s["seconds"] else None
+    return fns
+
+def bench_build(generated: dict, tmp: Path, jobs: int) -> dict:
+    """A full end-to-end build.py run over the corpus into tmp/site (generation results passed in warm, stored in tmp)."""
+    sys.path.insert(0, str(ROOT))
+    import build as pipeline   # the root build.py
+    kw_file = tmp/"keywords.json"
+    kw_file.write_text(json.dumps({"keywords": list(generated)}), encoding="utf-8")
+    args = pipeline.parser().parse_args(["--site_url", "https://bench.github.io/site", "--keywords_file", str(kw_file),
+                                         "--limit", str(len(generated)), "--jobs", str(jobs), "--full",
+                                         "--store", str(tmp/"posts.db")])
+    output.set_site_dir(tmp/"site")
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(None):
+        pipeline.build(args, warm={"generated": dict(generated)})
+    dt = time.perf_counter() - t0
+    site = output.site_dir()
+    files = [p for p in site.rglob("*") if p.is_file()]
+    pages = sum(1 for p in files if p.suffix == ".html")
+    return {"seconds": round(dt, 3), "pages": pages, "pages_per_s": round(pages / dt, 1),
+            "files": len(files), "bytes": sum(p.stat().st_size for p in files)}
+
+def run_one(n: int, jobs: int, seed: int = 0) -> dict:
+    """One corpus size, in this process: the caller runs each size in a fresh interpreter so peak RSS is per size."""
+    t0 = time.perf_counter(); generated = corpus(n, seed); corpus_s = time.perf_counter() - t0
+    with tempfile.TemporaryDirectory(prefix="ssg-bench-") as tmp:
+        tmp = Path(tmp)
+        try:
+            with contextlib.redirect_stdout(None):
+                functions = bench_functions(generated, tmp/"functions")
+            build = bench_build(generated, tmp, jobs)
+        finally:
+            for d in (tmp/"functions", tmp/"site"):   # per-site build state under .cache/sites/
+                output.set_site_dir(d); shutil.rmtree(output.state_path("x").parent, ignore_errors=True)
+    return {"posts": n, "corpus_s": round(corpus_s, 3), "build": build, "functions": functions, "peak_rss": peak_rss()}
+
+def run(sizes, jobs: int, seed: int = 0) -> dict:
+    results = {"meta": {"python": platform.python_version(), "machine": platform.machine(), "system": platform.system(),
+                        "jobs": jobs, "seed": seed, "date": time.strftime("%Y-%m-%d")}, "sizes": {}}
+    for n in sizes:
+        print(f"⏱  Benchmarking {n:,} posts ...", flush=True)
+        with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f: out = Path(f.name)
+        try:
+            subprocess.run([sys.executable, "-m", "ssg", "bench", "--_one", str(n), "--jobs", str(jobs),
+                            "--seed", str(seed), "--_result", str(out)], cwd=ROOT, check=True)
+            r = results["sizes"][str(n)] = json.loads(out.read_text(encoding="utf-8"))
+        finally:
+            out.unlink(missing_ok=True)
+        b = r["build"]; rss = f"{r['peak_rss'] / 2**20:,.0f} MB" if r["peak_rss"] else "n/a"
+        print(f"   build {b['seconds']:.2f}s  {b['pages_per_s']:,.0f} pages/s  {b['bytes'] / 2**20:,.1f} MB out  peak RSS {rss}")
+        for name, s in sorted(r["functions"].items(), key=lambda kv: -kv[1]["seconds"]):
+            print(f"   {name:<26} {s['seconds']:>9.3f}s  {s['calls']:>7}×  {s['pages']:>7} pages  {s['bytes'] / 1024:>10.1f} KiB")
+    return results
+
+def _worse(tolerance: float, name: str, now, base, higher_is_better: bool = False):
+    """A regression message when now is more than tolerance worse than base, else None."""
+    if not now or not base: return None
+    change = (base - now) / base if higher_is_better else (now - base) / base
+    if change > tolerance: return f"{name}: {base:,} → {now:,} ({change:.0%} worse)"
+    return None
+
+def compare(results: dict, baseline: dict, tolerance: float = TOLERANCE) -> list:
+    """Regressions of results against baseline, for every size both contain."""
+    found = []
+    if baseline.get("meta", {}).get("machine") != results["meta"]["machine"]:
+        print(f"⚠ Baseline was recorded on {baseline.get('meta', {}).get('machine')}, this is {results['meta']['machine']}")
+    for n, r in results["sizes"].items():
+        b = baseline.get("sizes", {}).get(n)
+        if not b: continue
+        checks = [(f"{n} build pages/s", r["build"]["pages_per_s"], b["build"]["pages_per_s"], True),
+                  (f"{n} build output bytes", r["build"]["bytes"], b["build"]["bytes"], False),
+                  (f"{n} peak RSS", r["peak_rss"], b["peak_rss"], False)]
+        for name, s in r["functions"].items():
+            base = b["functions"].get(name)
+            if base and max(s["seconds"], base["seconds"]) >= MIN_SECONDS:
+                checks.append((f"{n} {name} seconds", s["seconds"], base["seconds"], False))
+        found += [msg for msg in (_worse(tolerance, *c) for c in checks) if msg]
+    return found
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m ssg bench", description="Benchmark the generator on synthetic corpora.")
+    ap.add_argument("--sizes", default=",".join(map(str, SIZES)), help="Comma-separated corpus sizes (posts)")
+    ap.add_argument("--jobs", type=int, default=1, help="--jobs for the end-to-end build")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--baseline", default=str(BASELINE))
+    ap.add_argument("--tolerance", type=float, default=TOLERANCE, help="Allowed slowdown/growth vs the baseline (0.25 = 25%%)")
+    ap.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    ap.add_argument("--_one", type=int, help=argparse.SUPPRESS)
+    ap.add_argument("--_result", help=argparse.SUPPRESS)
+    args = ap.parse_args(argv)
+    if args._one:
+        Path(args._result).write_text(json.dumps(run_one(args._one, args.jobs, args.seed)), encoding="utf-8")
+        return 0
+
+    results = run([int(s) for s in args.sizes.split(",") if s.strip()], args.jobs, args.seed)
+    RESULTS.parent.mkdir(parents=True, exist_ok=True)
+    RESULTS.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        baseline_path.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+        print(f"📌 Baseline saved → {baseline_path}")
+        return 0
+    if not baseline_path.exists():
+        print(f"ℹ No baseline at {baseline_path}; run with --save-baseline to record one")
+        return 0
+    regressions = compare(results, json.loads(baseline_path.read_text(encoding="utf-8")), args.tolerance)
+    if regressions:
+        print(f"❌ {len(regressions)} regression(s) vs {baseline_path} (tolerance {args.tolerance:.0%}):")
+        for msg in regressions: print("   " + msg)
+        return 1
+    print(f"✅ No regressions vs {baseline_path} (tolerance {args.tolerance:.0%})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
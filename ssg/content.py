@@ -1,24 +1,102 @@
-# ssg/content.py — provides load_keywords() and call_openai() with a safe stub (no extra deps)
-import os, json, random
+# ssg/content.py — provides load_keywords()/iter_keywords() and call_openai() with a safe stub (no extra deps)
+import os, csv, json, random, urllib.request, urllib.error
+from pathlib import Path
+
+# Bump when the prompt or expected JSON shape changes: cached responses are keyed on it
+PROMPT_VERSION = "1"
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+
+class GenerationError(Exception):
+    """A failed generation request; retryable for rate limits, 5xx and network errors."""
+    def __init__(self, msg, retryable=False, retry_after=None):
+        super().__init__(msg)
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+MAX_REPORTED = 20      # collisions printed one by one; the rest are only counted
 
 def load_keywords(path):
     """
     Read data/keywords.json and return the list under {"keywords": [...] }.
     If the file is missing or invalid, return an empty list.
     """
+    return list(iter_keywords(path))
+
+def normalize_keyword(kw) -> str:
+    """Trim and collapse inner whitespace; case is kept (titles come from it)."""
+    return " ".join(str(kw).split())
+
+def _jsonl(f):
+    for line in f:
+        line = line.strip()
+        if not line: continue
+        try:
+            item = json.loads(line)
+        except ValueError:
+            continue
+        yield item.get("keyword", "") if isinstance(item, dict) else item
+
+def _csv(f):
+    rows = csv.reader(f)
+    header = next(rows, None)
+    if header is None: return
+    names = [h.strip().lower() for h in header]
+    if "keyword" in names: col = names.index("keyword")
+    else:
+        col = 0; yield header[0]    # no header row: the first line is a keyword already
+    for row in rows:
+        if len(row) > col: yield row[col]
+
+def iter_keywords(path):
+    """
+    Yield normalized, non-empty keywords from a keywords file, reading line by
+    line where the format allows: .jsonl/.ndjson (one JSON string or
+    {"keyword": ...} per line), .csv ("keyword" column, else the first), or
+    the {"keywords": [...]} .json document. Missing or invalid files yield nothing.
+    """
+    path = Path(path)
     try:
-        # 'path' can be a pathlib.Path or a string
-        if hasattr(path, "read_text"):
-            blob = path.read_text(encoding="utf-8")
-        else:
-            with open(path, "r", encoding="utf-8") as f:
-                blob = f.read()
-        data = json.loads(blob)
-        kws = data.get("keywords", [])
-        # Keep only non-empty strings
-        return [str(k).strip() for k in kws if str(k).strip()]
-    except Exception:
-        return []
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            if path.suffix in (".jsonl", ".ndjson"): items = _jsonl(f)
+            elif path.suffix == ".csv": items = _csv(f)
+            else:
+                data = json.load(f)
+                items = data.get("keywords", []) if isinstance(data, dict) else []
+            for kw in items:
+                kw = normalize_keyword(kw) if isinstance(kw, str) else ""
+                if kw: yield kw
+    except (OSError, ValueError, csv.Error):
+        return
+
+def unique_keywords(keywords, slugify, taken=(), stats=None):
+    """
+    Yield (keyword, slug) for the first keyword of each slug, lazily. Later
+    keywords with a slug already seen (or in taken: e.g. Markdown posts) are
+    skipped and reported, so no two posts write the same /posts/<slug>/.
+    stats (optional dict) gets "duplicates" (same keyword again) and "collisions".
+    """
+    owner = dict.fromkeys(taken, None)      # slug -> first keyword (None: taken by another source)
+    seen = set()
+    stats = stats if stats is not None else {}
+    stats.setdefault("duplicates", 0); stats.setdefault("collisions", 0)
+    for kw in keywords:
+        key = kw.casefold()
+        if key in seen:
+            stats["duplicates"] += 1; continue
+        seen.add(key)
+        slug = slugify(kw)
+        if not slug:
+            print(f"⚠ Keyword '{kw}' skipped: no usable slug"); continue
+        if slug in owner:
+            stats["collisions"] += 1
+            if stats["collisions"] <= MAX_REPORTED:
+                first = owner.get(slug)
+                by = f"keyword '{first}'" if first else "an existing post"
+                print(f"⚠ Keyword '{kw}' skipped: /posts/{slug}/ already belongs to {by}")
+            continue
+        owner[slug] = kw
+        yield kw, slug
 
 def _stub_post(keyword: str) -> dict:
     """
@@ -70,13 +148,56 @@ def _stub_post(keyword: str) -> dict:
         "internal_topics": ["Setup", "Maintenance", "Alternatives"]
     }
 
+def _prompt(keyword: str) -> list:
+    shape = json.dumps(_stub_post("example keyword"), ensure_ascii=False)
+    return [
+        {"role": "system", "content": "You write accurate, helpful buying guides. Reply with a single JSON object only."},
+        {"role": "user", "content": f"Write a structured article for the keyword: {keyword!r}.\n"
+                                    f"Use exactly the keys and value types of this example:\n{shape}"},
+    ]
+
+def request_post(keyword: str, api_key: str, base_url: str = None, model: str = None, timeout: float = 60) -> dict:
+    """
+    One chat-completions call returning the structured content dict.
+    base_url can point at any OpenAI-compatible server (e.g. a local stub for tests).
+    """
+    body = json.dumps({
+        "model": model or OPENAI_MODEL,
+        "messages": _prompt(keyword),
+        "response_format": {"type": "json_object"},
+    }).encode("utf-8")
+    req = urllib.request.Request(
+        (base_url or OPENAI_BASE_URL).rstrip("/") + "/chat/completions", data=body, method="POST",
+        headers={"Content-Type": "application/json", "Authorization": f"Bearer {api_key}"})
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as r:
+            reply = json.loads(r.read().decode("utf-8"))
+    except urllib.error.HTTPError as e:
+        retry_after = e.headers.get("Retry-After") if e.headers else None
+        raise GenerationError(f"HTTP {e.code} for {keyword!r}", retryable=e.code == 429 or e.code >= 500,
+                              retry_after=float(retry_after) if retry_after and retry_after.isdigit() else None)
+    except (urllib.error.URLError, TimeoutError, ConnectionError) as e:
+        raise GenerationError(f"{e} for {keyword!r}", retryable=True)
+    try:
+        data = json.loads(reply["choices"][0]["message"]["content"])
+    except (KeyError, IndexError, TypeError, ValueError):
+        raise GenerationError(f"Malformed response for {keyword!r}", retryable=True)
+    if not isinstance(data, dict):
+        raise GenerationError(f"Non-object response for {keyword!r}", retryable=True)
+    # Fields build.py/write_post rely on
+    data.setdefault("title", keyword.title())
+    data.setdefault("category", "General")
+    data.setdefault("tags", [t for t in keyword.lower().split() if t])
+    return data
+
 def call_openai(keyword: str) -> dict:
     """
-    Hook for AI generation. Right now it returns the stub to avoid any external dependency.
-    If you set OPENAI_API_KEY later, you can replace this with real API calls.
+    Hook for AI generation. Without OPENAI_API_KEY it returns the stub so CI never
+    needs network access; with it, one blocking API call (see ssg.generate for the
+    concurrent, cached path build.py uses).
     """
     api_key = os.getenv("OPENAI_API_KEY", "").strip()
-    # For now, always return stub so CI never fails on missing deps
-    # Later: if api_key: call the API and return structured content.
+    if api_key:
+        return request_post(keyword, api_key)
     return _stub_post(keyword)
 
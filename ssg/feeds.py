@@ -0,0 +1,70 @@
+# ssg/feeds.py — Atom feed with RFC 5005 archive documents + JSON Feed 1.1, dated from stored post dates (never the build time)
+import json, html
+from pathlib import Path
+from .output import write, owns
+
+FEED_SIZE = 20          # entries in feed.xml / feed.json and in each archive document
+ARCHIVE_DIR = "feed"    # feed/archive-<n>.xml, n = 1 for the oldest
+NL = "\n  "
+
+def rfc3339(day: str) -> str:
+    """ISO date -> midnight UTC timestamp; full timestamps pass through."""
+    return f"{day}T00:00:00Z" if day and len(day) == 10 else (day or "1970-01-01T00:00:00Z")
+
+def _atom(brand, site_url, self_url, items, links, archive=False) -> str:
+    entries = "".join(f"""
+  <entry>
+    <title>{html.escape(it["title"])}</title>
+    <link href="{it["url"]}"/>
+    <id>{it["url"]}</id>
+    <published>{rfc3339(it["published"])}</published>
+    <updated>{rfc3339(it["updated"])}</updated>
+    <summary>{html.escape(it["summary"][:300])}</summary>
+  </entry>""" for it in items)
+    head = [f'<link href="{self_url}" rel="self"/>', f'<link href="{site_url}/"/>']
+    head += [f'<link rel="{rel}" href="{href}"/>' for rel, href in links]
+    if archive: head.append("<fh:archive/>")
+    ns = ' xmlns:fh="http://purl.org/syndication/history/1.0"' if archive else ""
+    return f"""<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom"{ns}>
+  <title>{html.escape(brand)}</title>
+  {NL.join(head)}
+  <updated>{rfc3339(max((it["updated"] for it in items), default=""))}</updated>
+  <id>{self_url}</id>{entries}
+</feed>
+"""
+
+def _json_feed(brand, site_url, items) -> str:
+    return json.dumps({
+        "version": "https://jsonfeed.org/version/1.1", "title": brand, "home_page_url": f"{site_url}/",
+        "feed_url": f"{site_url}/feed.json",
+        "items": [{"id": it["url"], "url": it["url"], "title": it["title"], "summary": it["summary"][:300],
+                   "date_published": rfc3339(it["published"]), "date_modified": rfc3339(it["updated"]),
+                   "tags": it["tags"]} for it in items],
+    }, ensure_ascii=False, indent=1) + "\n"
+
+def write_feeds(root: Path, brand: str, site_url: str, items: list):
+    """
+    items: {"url", "title", "summary", "published", "updated", "tags"}, any
+    order (build order breaks ties); they are paged by published date, so a new
+    post always lands in feed.xml. feed.xml / feed.json carry the newest
+    FEED_SIZE entries. Every complete block of FEED_SIZE older entries becomes
+    an RFC 5005 archive document, linked prev-archive/next-archive; a full
+    archive never changes again unless one of its posts does (or a post is
+    back-dated into it).
+    """
+    root = Path(root); site_url = site_url.rstrip("/")
+    items = sorted(items, key=lambda it: it["published"])     # stable: ties keep build order
+    url = lambda n: f"{site_url}/{ARCHIVE_DIR}/archive-{n}.xml"
+    n_archives = len(items) // FEED_SIZE
+    for n in range(1, n_archives + 1):
+        block = items[(n - 1) * FEED_SIZE:n * FEED_SIZE][::-1]
+        links = [("current", f"{site_url}/feed.xml")]
+        if n > 1: links.append(("prev-archive", url(n - 1)))
+        if n < n_archives: links.append(("next-archive", url(n + 1)))
+        write(root/ARCHIVE_DIR/f"archive-{n}.xml", _atom(brand, site_url, url(n), block, links, archive=True))
+    owns(root/ARCHIVE_DIR)
+    newest = items[::-1][:FEED_SIZE]
+    links = [("prev-archive", url(n_archives))] if n_archives else []
+    write(root/"feed.xml", _atom(brand, site_url, f"{site_url}/feed.xml", newest, links))
+    write(root/"feed.json", _json_feed(brand, site_url, newest))
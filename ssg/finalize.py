@@ -0,0 +1,85 @@
+# ssg/finalize.py — optional post-processing (build.py --finalize): minify HTML/XML/JSON, write .gz/.br siblings
+import os, re, gzip, json
+from pathlib import Path
+from .utils import minify_html
+from .parallel import chunks, CHUNKS_PER_WORKER
+from . import output
+try:
+    import brotli  # requirements.txt; without it only .gz siblings are written
+except ImportError:
+    brotli = None
+
+MINIFY = {".html", ".xml", ".json"}
+# Compressed as-is (already minified or fingerprinted)
+COMPRESS = MINIFY | {".css", ".js", ".txt", ".svg"}
+MIN_COMPRESS = 256      # below this the .gz is usually bigger than the file
+_XML_GAP = re.compile(r">\s+<")
+
+def minify(path: Path, text: str) -> str:
+    ext = path.suffix
+    if ext == ".html": return minify_html(text)
+    if ext == ".json": return json.dumps(json.loads(text), ensure_ascii=False, separators=(",", ":"))
+    if ext == ".xml": return _XML_GAP.sub("><", text.strip()) + "\n"   # data-only XML: sitemaps, feeds
+    return text
+
+def _siblings(path: Path):
+    return [path.with_name(path.name + ".gz")] + ([path.with_name(path.name + ".br")] if brotli else [])
+
+def _fresh(path: Path) -> bool:
+    """Already finalized: every sibling exists and is at least as new as the file."""
+    mtime = path.stat().st_mtime_ns
+    return all(s.exists() and s.stat().st_mtime_ns >= mtime for s in _siblings(path))
+
+def _write(path: Path, blob: bytes):
+    tmp = path.with_name(f".{path.name}.tmp"); tmp.write_bytes(blob); os.replace(tmp, path)
+
+def finalize_file(path: str):
+    """Worker: minify in place, then precompress. Returns (path, original, minified, gzip, brotli) byte sizes."""
+    path = Path(path); raw = path.read_bytes(); blob = raw
+    if path.suffix in MINIFY:
+        try:
+            blob = minify(path, raw.decode("utf-8")).encode("utf-8")
+        except ValueError:   # undecodable or invalid JSON: ship untouched
+            blob = raw
+        if blob != raw: _write(path, blob)
+    gz = br = len(blob)
+    if len(blob) >= MIN_COMPRESS:
+        packed = gzip.compress(blob, compresslevel=9, mtime=0); gz = len(packed)
+        _write(path.with_name(path.name + ".gz"), packed)
+        if brotli:
+            packed = brotli.compress(blob, quality=11); br = len(packed)
+            _write(path.with_name(path.name + ".br"), packed)
+    return str(path), len(raw), len(blob), gz, br
+
+def _chunk(paths):
+    return [finalize_file(p) for p in paths]
+
+def finalize(site_dir: Path, pool=None, verbose: bool = True) -> dict:
+    """
+    Finalize every output file under site_dir that changed since its last
+    finalize (fresh .gz/.br siblings are skipped), across the pool's workers.
+    Prints per-file and total savings and returns the totals.
+    """
+    site_dir = Path(site_dir)
+    todo = [str(p) for p in sorted(site_dir.rglob("*"))
+            if p.suffix in COMPRESS and p.is_file() and not p.name.startswith(".") and not _fresh(p)]
+    if pool and todo:
+        results = [r for part in pool.map(_chunk, chunks(todo, pool.jobs * CHUNKS_PER_WORKER)) for r in part]
+    else:
+        results = [finalize_file(p) for p in todo]
+    # Minified files changed on disk; record their new stat and the siblings written next to them
+    output.restat(*todo)
+    output.keep(*(s for p in todo for s in _siblings(Path(p)) if s.exists()))
+    # Small files have no siblings to mark them fresh; drop the ones that were already minified
+    results = [r for r in results if r[1] != r[2] or r[3] != r[2]]
+    total = {"files": len(results), "original": 0, "minified": 0, "gzip": 0, "brotli": 0}
+    for path, raw, small, gz, br in results:
+        for key, n in zip(("original", "minified", "gzip", "brotli"), (raw, small, gz, br)): total[key] += n
+        if verbose and raw != small:
+            print(f"  {Path(path).relative_to(site_dir)}: {raw:,} → {small:,} B (gz {gz:,}" + (f", br {br:,}" if brotli else "") + ")")
+    if results:
+        pct = lambda n: 100 * (1 - n / total["original"]) if total["original"] else 0.0
+        print(f"🗜  Finalized {total['files']} file(s): {total['original']:,} → {total['minified']:,} B minified (-{pct(total['minified']):.1f}%), "
+              f"gzip {total['gzip']:,} B (-{pct(total['gzip']):.1f}%)"
+              + (f", brotli {total['brotli']:,} B (-{pct(total['brotli']):.1f}%)" if brotli else " (brotli not installed)"))
+    return total
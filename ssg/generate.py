@@ -0,0 +1,117 @@
+# ssg/generate.py — concurrent, rate-limited content generation with an on-disk response cache
+import os, json, time, random, asyncio, hashlib
+from pathlib import Path
+from .content import PROMPT_VERSION, OPENAI_MODEL, GenerationError, request_post, _stub_post
+
+class TokenBucket:
+    """Allows `rate` requests per second on average, bursting up to `capacity`."""
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = max(rate, 1e-6)
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.stamp = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+                self.stamp = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class ResponseCache:
+    """
+    One JSON file per response under `root`, keyed by keyword + prompt version + model.
+    Entries older than `ttl` seconds are ignored and removed by evict().
+    """
+    def __init__(self, root: Path, ttl: float, model: str = None):
+        self.root = Path(root); self.ttl = ttl; self.model = model or OPENAI_MODEL
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, keyword: str) -> Path:
+        key = hashlib.sha256(f"{PROMPT_VERSION}\0{self.model}\0{keyword.strip().lower()}".encode("utf-8")).hexdigest()
+        return self.root / f"{key}.json"
+
+    def get(self, keyword: str):
+        p = self._path(keyword)
+        try:
+            entry = json.loads(p.read_text(encoding="utf-8"))
+        except Exception:
+            return None
+        if time.time() - entry.get("created", 0) > self.ttl:
+            return None
+        return entry.get("data")
+
+    def put(self, keyword: str, data: dict):
+        p = self._path(keyword); tmp = p.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"created": time.time(), "keyword": keyword, "prompt_version": PROMPT_VERSION,
+                                   "model": self.model, "data": data}, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, p)
+
+    def evict(self) -> int:
+        now, n = time.time(), 0
+        for p in self.root.glob("*.json"):
+            try:
+                if now - json.loads(p.read_text(encoding="utf-8")).get("created", 0) > self.ttl:
+                    p.unlink(); n += 1
+            except Exception:
+                p.unlink(missing_ok=True); n += 1
+        return n
+
+def env_api_key() -> str:
+    """OPENAI_API_KEY, stripped; empty means every keyword gets the local stub."""
+    return os.getenv("OPENAI_API_KEY", "").strip()
+
+async def _generate_one(keyword, api_key, base_url, sem, bucket, cache, retries, backoff, stats):
+    hit = cache.get(keyword)
+    if hit is not None:
+        stats["cached"] += 1
+        return hit
+    async with sem:
+        for attempt in range(retries + 1):
+            await bucket.acquire()
+            try:
+                data = await asyncio.to_thread(request_post, keyword, api_key, base_url)
+                break
+            except GenerationError as e:
+                if not e.retryable or attempt == retries:
+                    raise
+                stats["retries"] += 1
+                delay = e.retry_after if e.retry_after is not None else backoff * (2 ** attempt)
+                await asyncio.sleep(delay + random.uniform(0, backoff))
+    stats["requested"] += 1
+    cache.put(keyword, data)
+    return data
+
+async def generate_all(keywords, cache_dir: Path, concurrency=8, rate=3.0, ttl_days=30,
+                       retries=5, backoff=1.0, api_key=None, base_url=None):
+    """
+    Returns ({keyword: content dict} in input order, stats). Cached keywords make no
+    request; without an API key every keyword gets the local stub. A keyword whose
+    request fails for good (non-retryable, or out of retries) is left out of the
+    result and listed in stats["errors"] {keyword: message}; the others still return.
+    """
+    api_key = (api_key if api_key is not None else env_api_key()).strip()
+    stats = {"requested": 0, "cached": 0, "retries": 0, "evicted": 0, "failed": 0, "errors": {}}
+    if not api_key:
+        return {kw: _stub_post(kw) for kw in keywords}, stats
+    cache = ResponseCache(cache_dir, ttl=ttl_days * 86400)
+    stats["evicted"] = cache.evict()
+    sem, bucket = asyncio.Semaphore(max(1, concurrency)), TokenBucket(rate)
+    results = await asyncio.gather(*(
+        _generate_one(kw, api_key, base_url, sem, bucket, cache, retries, backoff, stats) for kw in keywords),
+        return_exceptions=True)
+    out = {}
+    for kw, r in zip(keywords, results):
+        if isinstance(r, GenerationError): stats["errors"][kw] = str(r)
+        elif isinstance(r, BaseException): raise r
+        else: out[kw] = r
+    stats["failed"] = len(stats["errors"])
+    return out, stats
+
+def generate(keywords, cache_dir: Path, **kw):
+    return asyncio.run(generate_all(list(keywords), cache_dir, **kw))
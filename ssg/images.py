@@ -0,0 +1,153 @@
+# ssg/images.py — responsive image derivatives (Pillow): AVIF/WebP/JPEG at several widths, cached by content hash
+import os, json, hashlib, urllib.request
+from pathlib import Path
+from . import output
+
+ROOT = Path(__file__).resolve().parents[1]
+SOURCE_DIR = ROOT/"site"/"assets"/"img"/"posts"     # hand-placed sources (never pruned)
+OUT_URL = "/assets/img/d"
+CACHE_DIR = ROOT/".cache"/"images"
+INDEX_PATH = CACHE_DIR/"index.json"
+WIDTHS = (320, 640, 960, 1200)
+QUALITY = {"avif": 55, "webp": 78, "jpeg": 82}
+MIME = {"avif": "image/avif", "webp": "image/webp", "jpeg": "image/jpeg"}
+EXT = {"avif": "avif", "webp": "webp", "jpeg": "jpg"}
+
+def formats() -> tuple:
+    """Best first; AVIF only when this Pillow build can encode it."""
+    from PIL import features
+    return (("avif",) if features.check("avif") else ()) + ("webp", "jpeg")
+
+def _sha(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""): h.update(block)
+    return h.hexdigest()
+
+def _load(path: Path) -> dict:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        return data if isinstance(data, dict) else {}
+    except Exception:
+        return {}
+
+def _fetch(url: str) -> Path | None:
+    """Download a remote images.json source once into .cache/images/src/."""
+    dest = CACHE_DIR/"src"/hashlib.sha256(url.encode("utf-8")).hexdigest()
+    if dest.exists(): return dest
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, headers={"User-Agent": "SiteSmith"}), timeout=20) as r:
+            tmp = dest.with_suffix(".tmp"); tmp.write_bytes(r.read()); os.replace(tmp, dest)
+        return dest
+    except Exception as e:
+        print(f"⚠ Image download failed ({url}): {e}")
+        return None
+
+_LOCAL = (None, {})
+def local_source(slug: str) -> Path | None:
+    """site/assets/img/posts/<slug>.(jpg|jpeg|png|webp), from a listing cached until the dir changes."""
+    global _LOCAL
+    try:
+        mtime = SOURCE_DIR.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+    if _LOCAL[0] != mtime:
+        found = {}
+        for ext in (".webp", ".png", ".jpeg", ".jpg"):   # lowest priority first: .jpg wins
+            for p in SOURCE_DIR.glob(f"*{ext}"): found[p.name[:-len(ext)]] = p
+        _LOCAL = (mtime, found)
+    return _LOCAL[1].get(slug)
+
+def find_source(slug: str, image_map: dict) -> Path | None:
+    """Local site/assets/img/posts/<slug>.* first, then the data/images.json mapping (path or URL)."""
+    p = local_source(slug)
+    if p: return p
+    mapped = image_map.get(slug)
+    if not mapped: return None
+    if mapped.startswith(("http://", "https://")): return _fetch(mapped)
+    p = ROOT/"site"/mapped.lstrip("/") if mapped.startswith("/") else ROOT/mapped
+    return p if p.exists() else None
+
+def encode(src: str, sha: str, out_dir: str, widths=WIDTHS, fmts=None) -> dict:
+    """Worker: every width (never upscaled) x format for one source. Returns its index entry."""
+    from PIL import Image, ImageOps
+    fmts = fmts or formats()
+    with Image.open(src) as im:
+        im = ImageOps.exif_transpose(im)
+        has_alpha = im.mode in ("RGBA", "LA") or (im.mode == "P" and "transparency" in im.info)
+        im = im.convert("RGBA" if has_alpha else "RGB")
+        w0, h0 = im.size
+        sizes = sorted({w for w in widths if w < w0} | {min(w0, max(widths))})
+        variants = {f: [] for f in fmts}
+        for w in sizes:
+            h = max(1, round(h0 * w / w0))
+            frame = im if w == w0 else im.resize((w, h), Image.LANCZOS)
+            for f in fmts:
+                name = f"{sha[:16]}-{w}.{EXT[f]}"
+                out = frame
+                if f == "jpeg" and has_alpha:
+                    out = Image.new("RGB", frame.size, (255, 255, 255)); out.paste(frame, mask=frame.split()[-1])
+                opts = {"quality": QUALITY[f]}
+                if f == "jpeg": opts.update(optimize=True, progressive=True)
+                if f == "webp": opts.update(method=4)
+                tmp = Path(out_dir)/f".{name}.tmp"
+                out.save(tmp, format=f.upper(), **opts); os.replace(tmp, Path(out_dir)/name)
+                variants[f].append([name, w, h])
+    return {"size": [w0, h0], "variants": variants}
+
+def build_derivatives(slugs, image_map: dict, pool=None) -> dict:
+    """
+    Derivatives for every slug with a source image, encoding only sources whose
+    content hash has no complete cache entry. Writes and returns the
+    {slug: entry} index hero_img_for() reads.
+    """
+    OUT_DIR = output.site_dir()/"assets"/"img"/"d"
+    CACHE_DIR.mkdir(parents=True, exist_ok=True); OUT_DIR.mkdir(parents=True, exist_ok=True)
+    stats = _load(CACHE_DIR/"stat.json")        # path -> [mtime_ns, size, sha]: skip re-hashing untouched files
+    done = _load(CACHE_DIR/"manifest.json")     # sha -> entry
+    want, todo = {}, {}
+    for slug in slugs:
+        src = find_source(slug, image_map)
+        if not src: continue
+        st = src.stat(); key = str(src); cached = stats.get(key)
+        sha = cached[2] if cached and cached[:2] == [st.st_mtime_ns, st.st_size] else _sha(src)
+        stats[key] = [st.st_mtime_ns, st.st_size, sha]; want[slug] = sha
+        entry = done.get(sha)
+        complete = entry and all((OUT_DIR/v[0]).exists() for vs in entry["variants"].values() for v in vs)
+        if not complete: todo[sha] = str(src)
+    if todo:
+        shas = list(todo)
+        args = ([todo[s] for s in shas], shas, [str(OUT_DIR)]*len(shas))
+        results = pool.map(encode, *args) if pool else map(encode, *args)
+        for sha, entry in zip(shas, results): done[sha] = entry
+        print(f"🖼  Encoded {len(todo)} image(s), {len(want) - len(todo)} cached")
+    global _INDEX
+    index = _INDEX = {slug: done[sha] for slug, sha in want.items()}
+    # Derivatives of sources no post uses any more are pruned with the rest of the stale output
+    output.keep(*(OUT_DIR/v[0] for entry in index.values() for vs in entry["variants"].values() for v in vs))
+    output.owns(OUT_DIR)
+    for name, data in (("stat.json", stats), ("manifest.json", done), ("index.json", index)):
+        (CACHE_DIR/name).write_text(json.dumps(data, sort_keys=True), encoding="utf-8")
+    return index
+
+_INDEX = None
+def load_derivatives() -> dict:
+    global _INDEX
+    if _INDEX is None: _INDEX = _load(INDEX_PATH)
+    return _INDEX
+
+def use_derivatives(index: dict):
+    """Take a {slug: entry} index built elsewhere (merge step: the shards' entries)."""
+    global _INDEX
+    _INDEX = index
+
+def picture_tag(entry: dict, alt: str, sizes: str, base_prefix: str = "", eager: bool = False) -> str:
+    """<picture> with one srcset per format, a JPEG <img> fallback and explicit dimensions."""
+    from html import escape
+    srcset = lambda f: ", ".join(f"{base_prefix}{OUT_URL}/{name} {w}w" for name, w, _ in entry["variants"][f])
+    sources = "".join(f'<source type="{MIME[f]}" srcset="{srcset(f)}" sizes="{sizes}">' for f in entry["variants"] if f != "jpeg")
+    jpegs = entry["variants"]["jpeg"]; name, w, h = jpegs[min(1, len(jpegs) - 1)]
+    loading = 'fetchpriority="high"' if eager else 'loading="lazy" decoding="async"'
+    return (f'<picture>{sources}<img src="{base_prefix}{OUT_URL}/{name}" srcset="{srcset("jpeg")}" sizes="{sizes}" '
+            f'width="{w}" height="{h}" alt="{escape(alt or "")}" {loading}></picture>')
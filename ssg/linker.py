@@ -0,0 +1,104 @@
+# ssg/linker.py — automatic internal links: one Aho-Corasick automaton over every post's keyword + title, one pass per paragraph
+import re
+from array import array
+from html import escape
+
+MAX_LINKS = 5           # auto-links per page, each to a different post
+MIN_WORDS = 2           # shorter phrases ("blender") would link everywhere
+_WORD = re.compile(r"\w+")
+
+class Linker:
+    """
+    Word-level Aho-Corasick automaton built once per build from
+    (phrase, slug) pairs; a phrase seen twice keeps its first slug. Matching
+    a paragraph is one linear pass over its words, however many posts exist,
+    and phrases only match on whole words (case-insensitive).
+    """
+    def __init__(self, targets):
+        self.vocab, self.slugs = {}, []
+        self.lengths = array("H")               # words per pattern
+        goto, out = {}, array("i", [-1])        # goto: (node << 32 | word id) -> child node; one flat dict
+        for phrase, slug in targets:
+            words = _WORD.findall(str(phrase or "").lower())
+            if len(words) < MIN_WORDS: continue
+            node = 0
+            for w in words:
+                tok = self.vocab.setdefault(w, len(self.vocab))
+                child = goto.get(node << 32 | tok)
+                if child is None:
+                    child = goto[node << 32 | tok] = len(out); out.append(-1)
+                node = child
+            if out[node] < 0:
+                out[node] = len(self.slugs); self.slugs.append(slug); self.lengths.append(len(words))
+        # Failure links breadth-first; out_link skips to the nearest proper suffix that ends a pattern
+        children = {}
+        for key, child in goto.items(): children.setdefault(key >> 32, []).append((key & 0xFFFFFFFF, child))
+        fail, out_link = array("I", [0]) * len(out), array("i", [-1]) * len(out)
+        queue = [child for _, child in children.get(0, [])]
+        for node in queue:
+            for tok, child in children.get(node, []):
+                f = fail[node]
+                while f and (f << 32 | tok) not in goto: f = fail[f]
+                fail[child] = goto.get(f << 32 | tok, 0)
+                out_link[child] = fail[child] if out[fail[child]] >= 0 else out_link[fail[child]]
+                queue.append(child)
+        self.goto, self.out, self.fail, self.out_link = goto, out, fail, out_link
+
+    def __len__(self):
+        return len(self.slugs)
+
+    def matches(self, text: str, skip=None, limit=None) -> list:
+        """
+        Leftmost-longest, non-overlapping [(start, end, slug)] character spans of
+        phrases in text. skip: a set of slugs not to link; each chosen slug is
+        added to it, and a phrase whose slug is skipped gives way to the next
+        longest (or shorter, overlapping) phrase. limit: at most that many spans.
+        """
+        goto, out, fail, out_link, lengths, vocab = self.goto, self.out, self.fail, self.out_link, self.lengths, self.vocab
+        words = [(m.start(), m.end()) for m in _WORD.finditer(text)]
+        hits, node = [], 0
+        for i, (s, e) in enumerate(words):
+            tok = vocab.get(text[s:e].lower())
+            if tok is None: node = 0; continue
+            while node and (node << 32 | tok) not in goto: node = fail[node]
+            node = goto.get(node << 32 | tok, 0)
+            n = node if out[node] >= 0 else out_link[node]
+            while n > 0:
+                p = out[n]; hits.append((i - lengths[p] + 1, i, p)); n = out_link[n]
+        spans, taken = [], -1
+        for first, last, p in sorted(hits, key=lambda h: (h[0], h[0] - h[1])):
+            if limit is not None and len(spans) >= limit: break
+            slug = self.slugs[p]
+            if first > taken and (skip is None or slug not in skip):
+                spans.append((words[first][0], words[last][1], slug)); taken = last
+                if skip is not None: skip.add(slug)
+        return spans
+
+    def session(self, slug: str, base_prefix: str, cap: int = MAX_LINKS):
+        """A per-page linker: never links the page to itself, each target at most once, cap links in all."""
+        return LinkSession(self, slug, base_prefix, cap)
+
+class LinkSession:
+    def __init__(self, linker, slug, base_prefix, cap):
+        self.linker, self.base_prefix, self.cap = linker, base_prefix, cap
+        self.seen, self.slugs = {slug}, []
+
+    def __call__(self, text: str) -> str:
+        """Escaped HTML of text with auto-links added; a self or repeat match falls back to a shorter phrase."""
+        if len(self.slugs) >= self.cap: return escape(text)
+        parts, pos = [], 0
+        for s, e, slug in self.linker.matches(text, skip=self.seen, limit=self.cap - len(self.slugs)):
+            self.slugs.append(slug)
+            parts += [escape(text[pos:s]), f'<a href="{self.base_prefix}/posts/{slug}/">{escape(text[s:e])}</a>']
+            pos = e
+        return "".join(parts) + escape(text[pos:])
+
+_CURRENT = None
+
+def use_linker(linker):
+    """The build's Linker (None: no auto-links); pool workers get it through their initializer."""
+    global _CURRENT
+    _CURRENT = linker
+
+def current_linker():
+    return _CURRENT
@@ -0,0 +1,146 @@
+# ssg/manifest.py — content-hash build manifest + page dependency graph (incremental builds)
+import json, hashlib, datetime
+from pathlib import Path
+from .render import slugify
+from .templates import TEMPLATES_DIR
+from .assets import STATIC_DIR
+from .styles import styles
+
+MANIFEST_VERSION = 1
+# Source files whose changes invalidate every rendered page
+_CODE_INPUTS = ("templates.py", "render.py", "themes.py", "assets.py", "markdown_posts.py", "monetize.py", "linker.py", "styles.py")
+
+def _plain(obj):
+    # PostMeta (and anything else with as_dict) hashes like the dict it stands for
+    return obj.as_dict() if hasattr(obj, "as_dict") else str(obj)
+
+def digest(obj) -> str:
+    """Stable sha256 of any JSON-serialisable value."""
+    blob = json.dumps(obj, sort_keys=True, ensure_ascii=False, default=_plain).encode("utf-8")
+    return hashlib.sha256(blob).hexdigest()
+
+def template_fingerprint() -> str:
+    h = hashlib.sha256()
+    base = Path(__file__).resolve().parent
+    # static/ too: pages embed the fingerprinted asset names
+    files = ([base/name for name in _CODE_INPUTS] + sorted(TEMPLATES_DIR.rglob("*.html"))
+             + sorted(p for p in STATIC_DIR.rglob("*") if p.is_file()))
+    for p in files:
+        h.update(p.name.encode("utf-8")); h.update(p.read_bytes())
+    # Purged/critical Bulma: moves with the vendored copy and with any source that adds or drops a class name
+    h.update(styles()["hash"].encode("utf-8"))
+    return h.hexdigest()
+
+def post_pages(meta) -> list:
+    """Listing pages a post feeds: the edges of the dependency graph."""
+    return ["index", "archive", f"category/{slugify(meta['category'])}"] + [f"tag/{slugify(t)}" for t in meta["tags"]]
+
+class BuildManifest:
+    """
+    Persisted at .cache/build-manifest.json:
+      {"version", "config", "order", "posts": {slug: {"hash", "pages", "content", "published", "updated", "links"}}}
+    A post is dirty when its input hash changed or its output is missing; every
+    listing page it fed before or feeds now is re-rendered with it.
+    "content" hashes the payload alone: "updated" only moves when it changes,
+    not on config/template/related-list changes, and survives full rebuilds.
+    """
+    def __init__(self, path: Path, config: dict, force: bool = False):
+        self.path = Path(path)
+        old = self._load()
+        self.config = digest([config, template_fingerprint()])
+        self.full = force or old.get("version") != MANIFEST_VERSION or old.get("config") != self.config
+        self.known = old.get("posts", {}) if old.get("version") == MANIFEST_VERSION else {}
+        self.old_posts = {} if self.full else self.known
+        self.old_order = None if self.full else old.get("order")
+        self.posts, self.dirty = {}, set()
+
+    def _load(self) -> dict:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            return data if isinstance(data, dict) else {}
+        except Exception:
+            return {}
+
+    def post_changed(self, slug: str, inputs, meta: dict, output: Path, content=None, listing=None, alive=None,
+                     published=None) -> bool:
+        """
+        Record a post's current inputs; True when it must be re-rendered.
+        listing: what listing pages show of the post (defaults to meta). Body-only
+        edits leave it unchanged, so the listings it feeds are not re-rendered.
+        alive: every slug of the build; a post auto-linking to one that is gone
+        is re-rendered. published: the post's own first-published date, if it
+        has one (front matter, post store); else the first build that saw it.
+        """
+        today = datetime.date.today().isoformat()
+        content = digest(content if content is not None else inputs)
+        h = digest([content, inputs, self.config])
+        known = self.known.get(slug, {})
+        self.posts[slug] = {"hash": h, "pages": post_pages(meta), "content": content,
+                            "listing": digest(listing if listing is not None else meta), "record": known.get("record"),
+                            "published": published or known.get("published") or today,
+                            "updated": known.get("updated") if known.get("content") == content else today,
+                            "links": known.get("links", [])}
+        prev = self.old_posts.get(slug)
+        dead = alive is not None and any(s not in alive for s in self.posts[slug]["links"])
+        if self.full or prev is None or prev.get("hash") != h or dead or not Path(output).exists():
+            self.dirty.add(slug)
+            return True
+        return False
+
+    def note_record(self, slug: str, searchable):
+        """What the search index reads of a freshly rendered post (summary, headings)."""
+        self.posts[slug]["record"] = digest(searchable)
+
+    def note_links(self, slug: str, links: list):
+        """Posts a freshly rendered post auto-linked to (linker.LinkSession.slugs)."""
+        self.posts[slug]["links"] = links
+
+    def _relisted(self) -> set:
+        """Dirty or removed posts whose listing entry appeared, changed or disappeared."""
+        return {slug for slug in self.dirty | self.removed
+                if (self.old_posts.get(slug) or {}).get("listing") != (self.posts.get(slug) or {}).get("listing")}
+
+    def lastmod(self) -> dict:
+        """{slug: date of last content change} for every post in this build."""
+        return {slug: e["updated"] for slug, e in self.posts.items()}
+
+    @property
+    def removed(self) -> set:
+        return set(self.old_posts) - set(self.posts)
+
+    @property
+    def order(self) -> str:
+        return digest(list(self.posts))
+
+    def affected_pages(self) -> set:
+        pages = set()
+        for slug in self._relisted():
+            for entry in (self.old_posts.get(slug), self.posts.get(slug)):
+                if entry: pages.update(entry["pages"])
+        return pages
+
+    def dirty_terms(self, kind: str) -> set:
+        """Slugs of the category/tag pages that need re-rendering."""
+        prefix = kind + "/"
+        return {p[len(prefix):] for p in self.affected_pages() if p.startswith(prefix)}
+
+    @property
+    def listings_changed(self) -> bool:
+        """Index and archive pages list every post."""
+        return self.full or bool(self._relisted()) or self.old_order != self.order
+
+    @property
+    def records_changed(self) -> bool:
+        """Sitemap and feed also read post content dates and summaries."""
+        return self.listings_changed or bool(self.dirty)
+
+    @property
+    def search_changed(self) -> bool:
+        """The search index only needs rebuilding when a post's searchable fields moved."""
+        return self.listings_changed or any(
+            (self.old_posts.get(slug) or {}).get("record") != self.posts[slug]["record"] for slug in self.dirty)
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {"version": MANIFEST_VERSION, "config": self.config, "order": self.order, "posts": self.posts}
+        self.path.write_text(json.dumps(data, sort_keys=True, separators=(",", ":")), encoding="utf-8")
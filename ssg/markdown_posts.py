@@ -0,0 +1,85 @@
+# ssg/markdown_posts.py — content/posts/*.md source: front matter parsed up front (mtime-cached), bodies converted lazily
+import re, json, hashlib, datetime
+from pathlib import Path
+import yaml
+
+ROOT = Path(__file__).resolve().parents[1]
+CONTENT_DIR = ROOT/"content"/"posts"
+CACHE_PATH = ROOT/".cache"/"content.json"
+CACHE_VERSION = 1
+_HEADING = re.compile(r"^#{1,6}\s+(.+?)\s*#*\s*$", re.MULTILINE)
+
+def split_front_matter(text: str):
+    """('---\\nyaml\\n---\\nbody') -> (yaml text, body). No front matter -> ('', text)."""
+    if text.startswith("\ufeff"): text = text[1:]
+    if not text.startswith("---"): return "", text
+    end = text.find("\n---", 3)
+    if end < 0: return "", text
+    body_start = text.find("\n", end + 4)
+    return text[3:end], ("" if body_start < 0 else text[body_start + 1:])
+
+def _parse(path: Path, blob: bytes) -> dict:
+    """Everything listings/search need, without converting the body."""
+    fm_text, body = split_front_matter(blob.decode("utf-8"))
+    fm = yaml.safe_load(fm_text) or {}
+    if not isinstance(fm, dict): raise ValueError("front matter is not a mapping")
+    date = fm.get("date")
+    if isinstance(date, (datetime.date, datetime.datetime)): date = date.isoformat()[:10]
+    return {"fm": json.loads(json.dumps(fm, default=str)), "date": date and str(date)[:10],
+            "headings": _HEADING.findall(body), "words": len(body.split())}
+
+def _load_cache() -> dict:
+    try:
+        data = json.loads(CACHE_PATH.read_text(encoding="utf-8"))
+        return data["files"] if data.get("version") == CACHE_VERSION else {}
+    except Exception:
+        return {}
+
+def load_markdown_posts(content_dir: Path = CONTENT_DIR) -> list:
+    """
+    One entry per .md file, oldest first: {"path", "hash", "fm", "date", "headings", "words"}.
+    Files whose mtime/size match the cache are not read; files that were only
+    touched (same sha256) are not re-parsed.
+    """
+    cache, entries, fresh = _load_cache(), [], {}
+    for p in sorted(Path(content_dir).glob("*.md")):
+        rel = p.relative_to(ROOT).as_posix() if p.is_relative_to(ROOT) else str(p)
+        st = p.stat(); hit = cache.get(rel)
+        if not (hit and hit["stat"] == [st.st_mtime_ns, st.st_size]):
+            blob = p.read_bytes(); sha = hashlib.sha256(blob).hexdigest()
+            if not (hit and hit["hash"] == sha):
+                try:
+                    hit = dict(_parse(p, blob), hash=sha)
+                except (ValueError, yaml.YAMLError) as e:
+                    print(f"⚠ Skipping {rel}: {e}"); continue
+            hit = dict(hit, stat=[st.st_mtime_ns, st.st_size])
+        fresh[rel] = hit
+        entries.append(dict(hit, path=rel))
+    if fresh != cache:
+        CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        CACHE_PATH.write_text(json.dumps({"version": CACHE_VERSION, "files": fresh}, sort_keys=True), encoding="utf-8")
+    entries.sort(key=lambda e: (e["date"] or "", e["path"]))
+    return entries
+
+def payload_for(entry: dict, slugify) -> dict:
+    """A write_post payload; "source" marks it as Markdown so the body is converted at render time."""
+    fm = entry["fm"]
+    title = str(fm.get("title") or Path(entry["path"]).stem.replace("-", " ").title())
+    cats = fm.get("categories") or ([fm["category"]] if fm.get("category") else [])
+    tags = fm.get("tags") or []
+    if isinstance(cats, (str, int, float)): cats = [cats]     # "categories: SEO" is one category, not "S"
+    if isinstance(tags, (str, int, float)): tags = [tags]
+    desc = str(fm.get("description") or "")
+    return {
+        "keyword": None, "slug": str(fm.get("slug") or slugify(title)), "title": title,
+        "category": str(cats[0]) if cats else "General", "tags": [str(t) for t in tags],
+        "date": entry["date"],
+        "source": {"path": entry["path"], "hash": entry["hash"], "headings": entry["headings"], "words": entry["words"]},
+        "data": {"summary": desc, "meta_description": desc, "products": fm.get("products") or []},
+    }
+
+def render_body(source: dict) -> str:
+    """Markdown -> HTML for one post; only called for posts being (re)rendered."""
+    import markdown
+    _, body = split_front_matter((ROOT/source["path"]).read_text(encoding="utf-8"))
+    return markdown.markdown(body, extensions=["extra", "sane_lists", "toc"])
@@ -0,0 +1,189 @@
+# ssg/output.py — the one write path into site/: hash-compared atomic writes, emitted-path record, stale-output pruning
+import os, json, hashlib
+from pathlib import Path
+from . import profile
+
+ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_SITE = ROOT/"site"
+# Never pruned: not produced by the build but part of the deployed site
+PROTECTED = {".nojekyll", "favicon.ico", "CNAME"}
+PROTECTED_DIRS = ("assets/img/posts/",)
+
+_site = DEFAULT_SITE
+_records = {}       # rel path -> [sha256 of the generated bytes, size on disk, mtime_ns on disk]
+_previous = None    # last build's records, loaded on first use
+_owned = set()      # rel dirs ("posts/x/") and path prefixes ("sitemap-") this build regenerated completely
+stats = {"written": 0, "unchanged": 0, "bytes": 0}   # bytes: actually written to disk
+
+def set_site_dir(path):
+    """Build into another directory (benchmarks, shards). Call before any write."""
+    global _site, _previous
+    _site = Path(path).resolve(); _previous = None
+
+def site_dir() -> Path:
+    return _site
+
+def state_path(name: str) -> Path:
+    """Per-site build state: .cache/<name> for site/, .cache/sites/<hash>/<name> for any other site dir."""
+    if _site == DEFAULT_SITE: return ROOT/".cache"/name
+    return ROOT/".cache"/"sites"/hashlib.sha256(str(_site).encode("utf-8")).hexdigest()[:12]/name
+
+def rel(path) -> str:
+    path = Path(path)
+    try:
+        return path.relative_to(_site).as_posix()     # paths built from site_dir(): no syscalls
+    except ValueError:
+        return path.resolve().relative_to(_site).as_posix()
+
+def _load() -> dict:
+    global _previous
+    if _previous is None:
+        try:
+            data = json.loads(state_path("output-manifest.json").read_text(encoding="utf-8"))
+            _previous = data["files"] if data.get("site") == str(_site) else {}
+        except Exception:
+            _previous = {}
+    return _previous
+
+def _record(r: str, sha: str, path: Path):
+    st = path.stat(); _records[r] = [sha, st.st_size, st.st_mtime_ns]
+
+def write(path, data) -> bool:
+    """
+    Write text/bytes to path under the site dir unless the file already holds
+    exactly these bytes (its mtime is then left alone). Atomic via rename.
+    Returns True when the file changed.
+    """
+    path = Path(path); blob = data.encode("utf-8") if isinstance(data, str) else data
+    with profile.phase("write", "io"):
+        r = rel(path); sha = hashlib.sha256(blob).hexdigest()
+        old = _load().get(r)
+        try:
+            st = path.stat()
+            # Same generated bytes as last build and the file untouched since: no need to read it back
+            same = (old is not None and old == [sha, st.st_size, st.st_mtime_ns]) or \
+                   (st.st_size == len(blob) and path.read_bytes() == blob)
+        except FileNotFoundError:
+            same = False
+        if not same:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f".{path.name}.tmp"); tmp.write_bytes(blob); os.replace(tmp, path)
+            stats["bytes"] += len(blob)
+        _record(r, sha, path); stats["unchanged" if same else "written"] += 1
+    return not same
+
+def replace(tmp, path) -> bool:
+    """Move a fully written temp file into place (streamed writers), elided the same way as write()."""
+    tmp, path = Path(tmp), Path(path)
+    with profile.phase("replace", "io"):
+        h = hashlib.sha256()
+        with open(tmp, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""): h.update(block)
+        size = tmp.stat().st_size
+        try:
+            same = path.stat().st_size == size and path.read_bytes() == tmp.read_bytes()
+        except FileNotFoundError:
+            same = False
+        if same: tmp.unlink()
+        else: os.replace(tmp, path); stats["bytes"] += size
+        _record(rel(path), h.hexdigest(), path); stats["unchanged" if same else "written"] += 1
+    return not same
+
+def emitted() -> list:
+    """Rel paths recorded by this build so far (what a shard hands to the merge step)."""
+    return sorted(_records)
+
+def keep(*paths):
+    """Mark outputs this build did not regenerate (incremental builds, caches) as still current."""
+    prev = _load()
+    for p in paths:
+        p = Path(p); r = rel(p)
+        if r in _records: continue
+        if r in prev: _records[r] = prev[r]
+        elif p.is_file(): _record(r, "", p)
+
+def keep_dir(path):
+    """keep() every file under a directory tree (asset/image caches managed elsewhere)."""
+    path = Path(path)
+    if path.is_dir(): keep(*(p for p in path.rglob("*") if p.is_file() and not p.name.startswith(".")))
+
+def owns(path, prefix: bool = False):
+    """
+    This build regenerated everything under the dir path (or, with prefix=True,
+    every file whose path starts with it): whatever it did not write there is stale.
+    """
+    r = rel(path)
+    _owned.add(r if prefix else r + "/")
+
+def restat(*paths):
+    """Refresh size/mtime of recorded files rewritten in place (finalize)."""
+    for p in paths:
+        r = rel(p)
+        if r in _records and Path(p).exists():
+            st = Path(p).stat(); _records[r][1:] = [st.st_size, st.st_mtime_ns]
+
+def reset():
+    """Forget everything recorded so far (new build in this process, fresh pool worker)."""
+    global _previous
+    _records.clear(); _owned.clear(); stats.update(written=0, unchanged=0, bytes=0); _previous = None
+
+def drain():
+    """Worker side: hand this process's records (and owned dirs) to the parent, then forget them."""
+    out = (dict(_records), sorted(_owned), dict(stats)); _records.clear(); _owned.clear()
+    stats.update(written=0, unchanged=0, bytes=0)
+    return out
+
+def merge(drained):
+    """Parent side: fold a worker's drain() into this build's record."""
+    records, owned, counts = drained
+    _records.update(records); _owned.update(owned)
+    for k, n in counts.items(): stats[k] += n
+
+def _is_owned(r: str, dirs: set, prefixes: tuple) -> bool:
+    if r.startswith(prefixes): return True
+    i = r.find("/")
+    while i >= 0:
+        if r[:i + 1] in dirs: return True
+        i = r.find("/", i + 1)
+    return False
+
+def _protected(r: str) -> bool:
+    return r in PROTECTED or r.startswith(PROTECTED_DIRS) or "/." in f"/{r}"
+
+def _fresh_sibling(r: str) -> bool:
+    """X.gz / X.br written by finalize after X's current bytes: it stays with X."""
+    if not r.endswith((".gz", ".br")) or r[:-3] not in _records: return False
+    try:
+        return (_site/r).stat().st_mtime_ns >= (_site/r[:-3]).stat().st_mtime_ns
+    except FileNotFoundError:
+        return False
+
+def prune(full: bool) -> list:
+    """
+    Delete what this build no longer produces. Full builds: every unrecorded
+    file in the site dir. Incremental builds: last build's files carry over
+    unless they sit under a dir this build owns. Precompressed siblings live
+    as long as their file does and is not newer. Returns the removed rel paths.
+    """
+    prev = _load()
+    if full:
+        candidates = {p.relative_to(_site).as_posix() for p in _site.rglob("*") if p.is_file()}
+    else:
+        candidates = set(prev)
+        dirs = {d for d in _owned if d.endswith("/")}; prefixes = tuple(d for d in _owned if not d.endswith("/"))
+        for r in prev:
+            if r not in _records and not _is_owned(r, dirs, prefixes): _records[r] = prev[r]
+    for r in candidates - set(_records):
+        if _fresh_sibling(r): _record(r, "", _site/r)
+    removed = sorted(r for r in candidates - set(_records) if not _protected(r))
+    for r in removed:
+        (_site/r).unlink(missing_ok=True)
+    for d in sorted({(_site/r).parent for r in removed}, key=lambda p: -len(p.parts)):
+        while d != _site and d.is_dir() and not any(d.iterdir()):
+            d.rmdir(); d = d.parent
+    return removed
+
+def save():
+    """Persist this build's record; the next build compares against it."""
+    path = state_path("output-manifest.json"); path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"site": str(_site), "files": _records}, sort_keys=True), encoding="utf-8")
@@ -0,0 +1,76 @@
+# ssg/parallel.py — fan post + taxonomy rendering out to a process pool (build.py --jobs N)
+import os
+from concurrent.futures import ProcessPoolExecutor
+from .render import write_post, build_category_pages, build_tag_pages
+from .siteindex import SiteIndex
+from .linker import use_linker
+from . import output, profile
+
+CHUNKS_PER_WORKER = 4
+
+def resolve_jobs(jobs: int) -> int:
+    """--jobs 0 means one worker per CPU core."""
+    return max(1, jobs or os.cpu_count() or 1)
+
+def make_pool(jobs: int, linker=None):
+    """A ProcessPoolExecutor for jobs > 1, else None (serial path). linker: the build's auto-link automaton."""
+    jobs = resolve_jobs(jobs)
+    if jobs <= 1: return None
+    # Forked workers start with an empty output record (and profile); both come back via drain()
+    # The linker is pickled once per worker rather than once per chunk
+    pool = ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(linker,)); pool.jobs = jobs
+    return pool
+
+def _init_worker(linker=None):
+    output.reset(); profile.reset_worker(); use_linker(linker)
+
+def chunks(items, n: int):
+    """Split items into at most n contiguous, order-preserving chunks."""
+    items = list(items); n = max(1, min(n, len(items)))
+    size, extra = divmod(len(items), n)
+    out, s = [], 0
+    for i in range(n):
+        e = s + size + (1 if i < extra else 0)
+        out.append(items[s:e]); s = e
+    return [c for c in out if c]
+
+def _n_chunks(pool) -> int:
+    return pool.jobs * CHUNKS_PER_WORKER
+
+def _post_chunk(common, tasks):
+    brand, site_url, base_prefix, amazon_tag, theme, analytics_html = common
+    records = [write_post(brand, site_url, base_prefix, payload, amazon_tag, theme, related, analytics_html)
+               for payload, related in tasks]
+    return records, output.drain(), profile.drain()   # paths this worker emitted go back to the parent's output record
+
+def write_posts(pool, brand, site_url, base_prefix, tasks, amazon_tag, theme, analytics_html):
+    """
+    tasks: [(payload, related_list)]. Yields post records in task order;
+    each page is independent, so output is identical to the serial loop.
+    """
+    common = (brand, site_url, base_prefix, amazon_tag, theme, analytics_html)
+    if pool is None:
+        for payload, related in tasks:
+            yield write_post(brand, site_url, base_prefix, payload, amazon_tag, theme, related, analytics_html)
+        return
+    for records, emitted, spans in pool.map(_post_chunk, [common]*len(tasks), chunks(tasks, _n_chunks(pool))):
+        output.merge(emitted); profile.merge(spans)
+        yield from records
+
+def _taxonomy_chunk(kind, args, only):
+    builder = build_category_pages if kind == "category" else build_tag_pages
+    builder(*args, only=set(only))
+    return output.drain(), profile.drain()
+
+def build_taxonomy_pages(pool, kind, brand, site_url, base_prefix, theme, posts_meta, analytics_html, only=None):
+    """build_category_pages / build_tag_pages with the term pages split across workers."""
+    args = (brand, site_url, base_prefix, theme, posts_meta, analytics_html)
+    if pool is None:
+        builder = build_category_pages if kind == "category" else build_tag_pages
+        return builder(*args, only=only)
+    index = SiteIndex.of(posts_meta)
+    terms = set((index.category_slugs if kind == "category" else index.tag_slugs).values())
+    if only is not None: terms &= set(only)
+    parts = chunks(sorted(terms), _n_chunks(pool))
+    for emitted, spans in pool.map(_taxonomy_chunk, [kind]*len(parts), [args]*len(parts), parts):
+        output.merge(emitted); profile.merge(spans)
@@ -0,0 +1,79 @@
+# ssg/postmeta.py — compact listing metadata: PostMeta records with interned category/tag ids (million-post builds)
+from array import array
+
+class TermTable:
+    """
+    Category and tag names <-> small int ids. One table per process: every
+    post that uses a term shares the single string stored here, so memory
+    grows with unique terms, not with tag occurrences.
+    """
+    def __init__(self):
+        self.names, self.ids = [], {}
+
+    def id(self, name: str) -> int:
+        i = self.ids.get(name)
+        if i is None:
+            i = self.ids[name] = len(self.names); self.names.append(name)
+        return i
+
+    def __len__(self):
+        return len(self.names)
+
+TERMS = TermTable()
+FIELDS = ("slug", "title", "category", "tags")
+
+class PostMeta:
+    """
+    What listings know about a post: slug, title, one category id and an
+    array('I') of tag ids into TERMS. Reads like the old meta dict
+    (m["tags"], m.get("title")) so every generator takes either; pickles
+    by value and re-interns in pool workers.
+    """
+    __slots__ = ("slug", "title", "cat", "tag_ids")
+
+    def __init__(self, slug: str, title: str, category: str, tags=()):
+        self.slug, self.title = slug, title
+        self.cat = TERMS.id(category)
+        self.tag_ids = array("I", map(TERMS.id, tags))
+
+    @classmethod
+    def of(cls, m):
+        """Accept a PostMeta or a {"slug", "title", "category", "tags"} dict."""
+        return m if isinstance(m, cls) else cls(m["slug"], m["title"], m["category"], m["tags"])
+
+    @property
+    def category(self) -> str:
+        return TERMS.names[self.cat]
+
+    @property
+    def tags(self) -> list:
+        names = TERMS.names
+        return [names[i] for i in self.tag_ids]
+
+    def __getitem__(self, key):
+        if key not in FIELDS: raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in FIELDS else default
+
+    def keys(self):
+        return FIELDS
+
+    def as_dict(self) -> dict:
+        return {"slug": self.slug, "title": self.title, "category": self.category, "tags": self.tags}
+
+    def __eq__(self, other):
+        return isinstance(other, PostMeta) and self.as_dict() == other.as_dict()
+
+    __hash__ = None
+
+    def __reduce__(self):
+        return PostMeta, (self.slug, self.title, self.category, self.tags)
+
+    def __repr__(self):
+        return f"PostMeta({self.slug!r}, {self.title!r}, {self.category!r}, {self.tags!r})"
+
+def slim_record(rec: dict) -> dict:
+    """A post record (render.post_record) without the listing fields its PostMeta already holds."""
+    return {k: v for k, v in rec.items() if k not in ("title", "category", "tags")}
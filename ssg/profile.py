@@ -0,0 +1,104 @@
+# ssg/profile.py — opt-in build profiler (build.py --profile): per-phase/page-type wall time, calls, bytes, peak memory + Chrome trace
+import os, json, time, threading, tracemalloc
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from . import output
+
+MAX_EVENTS = 500_000    # trace events kept; aggregates are always complete
+_NULL = nullcontext()
+_active = None
+
+class Profiler:
+    """
+    Spans nest: each records wall time, bytes the output layer wrote while it
+    was open and the traced-heap peak reached inside it (children included).
+    Timestamps use the system-wide monotonic clock, so spans recorded in pool
+    workers line up with the parent's on one timeline.
+    """
+    def __init__(self, memory: bool = True):
+        self.memory = memory
+        self.t0 = time.perf_counter_ns()
+        self.pid = os.getpid()
+        self.events, self.stats, self.stack = [], {}, []
+        if memory and not tracemalloc.is_tracing(): tracemalloc.start()
+
+    def _peak(self) -> int:
+        return tracemalloc.get_traced_memory()[1] if self.memory else 0
+
+    @contextmanager
+    def span(self, name: str, cat: str):
+        if self.stack: self.stack[-1] = max(self.stack[-1], self._peak())
+        if self.memory: tracemalloc.reset_peak()
+        self.stack.append(0)
+        b0 = output.stats["bytes"]; start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            end = time.perf_counter_ns()
+            peak = max(self.stack.pop(), self._peak()); nbytes = output.stats["bytes"] - b0
+            if self.stack: self.stack[-1] = max(self.stack[-1], peak)
+            s = self.stats.setdefault(f"{cat}:{name}", [0, 0, 0, 0])
+            s[0] += 1; s[1] += end - start; s[2] += nbytes; s[3] = max(s[3], peak)
+            if len(self.events) < MAX_EVENTS:
+                self.events.append({"name": name, "cat": cat, "ph": "X", "ts": (start - self.t0) / 1000,
+                                    "dur": (end - start) / 1000, "pid": self.pid, "tid": threading.get_ident(),
+                                    "args": {"bytes": nbytes, "peak_kb": peak // 1024}})
+
+    def drain(self):
+        out = (self.events, self.stats); self.events, self.stats = [], {}
+        return out
+
+    def merge(self, drained):
+        events, stats = drained
+        self.events.extend(events[:max(0, MAX_EVENTS - len(self.events))])
+        for key, (calls, wall, nbytes, peak) in stats.items():
+            s = self.stats.setdefault(key, [0, 0, 0, 0])
+            s[0] += calls; s[1] += wall; s[2] += nbytes; s[3] = max(s[3], peak)
+
+def start(memory: bool = True) -> Profiler:
+    global _active
+    _active = Profiler(memory)
+    return _active
+
+def phase(name: str, cat: str = "phase"):
+    """with phase("sitemap"): ... — a no-op unless --profile is on. cat="page" for per-page spans, "io" for writes."""
+    return _active.span(name, cat) if _active else _NULL
+
+def reset_worker():
+    """Pool initializer: a forked worker keeps the parent's clock but none of its spans."""
+    if _active:
+        _active.pid = os.getpid(); _active.events, _active.stats, _active.stack = [], {}, []
+
+def drain():
+    return _active.drain() if _active else None
+
+def merge(drained):
+    if _active and drained: _active.merge(drained)
+
+def summary(prof: Profiler) -> dict:
+    groups = {}
+    for key, (calls, wall, nbytes, peak) in prof.stats.items():
+        cat, name = key.split(":", 1)
+        groups.setdefault(cat, {})[name] = {"calls": calls, "wall_s": round(wall / 1e9, 4), "avg_ms": round(wall / 1e6 / calls, 3),
+                                            "bytes": nbytes, "peak_mb": round(peak / 2**20, 2)}
+    return {"wall_s": round((time.perf_counter_ns() - prof.t0) / 1e9, 3),
+            "peak_mb": round(prof._peak() / 2**20, 2) if not prof.stack else None,
+            "phases": groups.get("phase", {}), "pages": groups.get("page", {}), "io": groups.get("io", {})}
+
+def finish(out_dir: Path) -> dict:
+    """Write summary.json + trace.json (open in Perfetto / chrome://tracing) and print the top phases."""
+    global _active
+    prof, _active = _active, None
+    if prof is None: return {}
+    data = summary(prof)
+    if prof.memory: data["peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 2); tracemalloc.stop()
+    out_dir = Path(out_dir); out_dir.mkdir(parents=True, exist_ok=True)
+    (out_dir/"summary.json").write_text(json.dumps(data, indent=2), encoding="utf-8")
+    names = [{"name": "process_name", "ph": "M", "pid": pid, "args": {"name": "build" if pid == prof.pid else f"worker {pid}"}}
+             for pid in sorted({e["pid"] for e in prof.events})]
+    (out_dir/"trace.json").write_text(json.dumps({"traceEvents": names + prof.events, "displayTimeUnit": "ms"}), encoding="utf-8")
+    print(f"⏱  Profile ({data['wall_s']}s, peak {data['peak_mb']} MB traced) → {out_dir}/summary.json, trace.json")
+    rows = sorted(data["phases"].items(), key=lambda kv: -kv[1]["wall_s"])[:12] + sorted(data["pages"].items(), key=lambda kv: -kv[1]["wall_s"])
+    for name, s in rows:
+        print(f"   {name:<22} {s['wall_s']:>8.3f}s  {s['calls']:>7}×  {s['bytes'] / 1024:>10.1f} KiB  peak {s['peak_mb']:>7.1f} MB")
+    return data
@@ -0,0 +1,91 @@
+# ssg/related.py — related posts by TF-IDF cosine similarity over tags, category and title terms (NumPy)
+import numpy as np
+from .search import tokenize
+
+FIELD_WEIGHTS = {"tag": 2.0, "title": 1.0, "category": 1.0}
+# Candidate pairs generated per post on average; bounds the work to O(n * PAIR_BUDGET)
+PAIR_BUDGET = 200
+BATCH = 4096
+
+def _features(posts_meta):
+    """Sparse COO (rows, cols, vals) of field-weighted features plus each post's category feature id."""
+    ids, rows, cols, vals, cat = {}, [], [], [], []
+    w_cat, w_tag, w_title = FIELD_WEIGHTS["category"], FIELD_WEIGHTS["tag"], FIELD_WEIGHTS["title"]
+    for i, m in enumerate(posts_meta):
+        feats = {("category", m["category"]): w_cat}
+        for t in m["tags"]: feats[("tag", t.lower())] = w_tag
+        for t in tokenize(m["title"]): feats.setdefault(("title", t), w_title)
+        for key, w in feats.items():
+            fid = ids.get(key)
+            if fid is None: fid = ids[key] = len(ids)
+            rows.append(i); cols.append(fid); vals.append(w)
+        cat.append(ids[("category", m["category"])])
+    return (np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64),
+            np.asarray(vals, dtype=np.float64), np.asarray(cat, dtype=np.int64), len(ids))
+
+def _df_cap(df, n, budget):
+    """Largest document frequency whose features together generate at most n*budget pairs."""
+    d = np.sort(df)
+    within = np.cumsum(d.astype(np.float64) ** 2) <= n * budget
+    return int(d[within][-1]) if within.any() else 1
+
+def related_posts(posts_meta, k=5, pair_budget=PAIR_BUDGET):
+    """
+    Returns, for each post (by position), the positions of its top-k neighbours.
+
+    Rows are TF-IDF weighted and L2-normalised; cosine scores come from
+    accumulating shared features through per-feature posting lists, batched.
+    Features more common than an adaptive df cap (think "air", "fryer") only
+    add noise and quadratic work, so they do not generate candidates; the
+    category term is still scored exactly since each post has exactly one.
+    Posts with fewer than k candidates are topped up with nearby posts from
+    the same category, then the rest of the site.
+    """
+    n = len(posts_meta)
+    if n < 2: return [[] for _ in range(n)]
+    rows, cols, vals, cat, nf = _features(posts_meta)
+    df = np.bincount(cols, minlength=nf)
+    vals = vals * (np.log((1 + n) / (1 + df[cols])) + 1)
+    vals /= np.sqrt(np.bincount(rows, weights=vals ** 2, minlength=n))[rows]
+    cat_w = np.zeros(n); is_cat = cols == cat[rows]; cat_w[rows[is_cat]] = vals[is_cat]
+
+    # Inverted lists (CSC) over candidate-generating features only
+    keep = (df[cols] <= _df_cap(df, n, pair_budget)) & ~is_cat
+    r, c, v = rows[keep], cols[keep], vals[keep]
+    order = np.argsort(c, kind="stable")
+    post_docs, post_vals = r[order], v[order]
+    indptr = np.concatenate(([0], np.cumsum(np.bincount(c, minlength=nf))))
+
+    top = [[] for _ in range(n)]
+    for lo in range(0, n, BATCH):
+        sel = (r >= lo) & (r < lo + BATCH)
+        q, f, w = r[sel], c[sel], v[sel]
+        counts = indptr[f + 1] - indptr[f]
+        if counts.sum() == 0: continue
+        # Expand each (query, feature) into the feature's posting list
+        offsets = np.repeat(indptr[f] - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+        qq = np.repeat(q, counts); d = post_docs[offsets]
+        pair_w = np.repeat(w, counts) * post_vals[offsets]
+        keys, inv = np.unique(qq * n + d, return_inverse=True)
+        score = np.bincount(inv, weights=pair_w)
+        qq, d = keys // n, keys % n
+        score += np.where(cat[qq] == cat[d], cat_w[qq] * cat_w[d], 0.0)
+        ok = qq != d; qq, d, score = qq[ok], d[ok], score[ok]
+        # Best k per query: pairs are already ordered by (query, position), so one stable
+        # sort on query - score (cosine scores lie in [0, 1]) orders by (query, -score, position)
+        order = np.argsort(qq * 4.0 - score, kind="stable"); qq, d = qq[order], d[order]
+        starts = np.searchsorted(qq, qq, side="left")
+        best = (np.arange(len(qq)) - starts) < k
+        for i, j in zip(qq[best].tolist(), d[best].tolist()): top[i].append(j)
+
+    by_cat = {}
+    for i, cid in enumerate(cat.tolist()): by_cat.setdefault(cid, []).append(i)
+    pos_in_cat = {i: p for members in by_cat.values() for p, i in enumerate(members)}
+    for i in range(n):
+        if len(top[i]) >= k: continue
+        seen = set(top[i]) | {i}; members = by_cat[int(cat[i])]; p = pos_in_cat[i]
+        nearby = [members[x] for dist in range(1, k + 1) for x in (p - dist, p + dist) if 0 <= x < len(members)]
+        for j in nearby + list(range(min(n, 2 * k + 1))):
+            if len(top[i]) >= k: break
+            if j not in seen: top[i].append(j); seen.add(j)
+    return top
@@ -1,9 +1,18 @@
 # ssg/render.py — structured pages + longer posts + citations + JSON-LD + safe images
-import os, re, json, html, datetime, math
+import json, html, datetime, math
 from pathlib import Path
 from typing import List, Dict
-from .themes import THEMES
-from .templates import INDEX_SHELL, POST_TPL, PAGE_TPL, NOT_FOUND_TPL
+from .templates import render, site_context
+from .siteindex import SiteIndex
+from .search import build_index, write_index
+from .feeds import write_feeds
+from .sitemap import SitemapWriter, write_sitemap_index
+from .output import site_dir, write, owns
+from .images import load_derivatives, picture_tag, local_source
+from .markdown_posts import render_body
+from .monetize import inject_blocks
+from .linker import current_linker
+from . import profile
 
 PAGE_SIZE = 8
 
@@ -20,23 +29,26 @@ except Exception:
         return s or "post"
 
 # --- optional slug->image mapping (data/images.json) ---
-_IMAGE_MAP = None
+# Cached per process and re-read when the file changes (warm dev-server rebuilds)
+_IMAGE_MAP = (None, {})
 def load_image_map() -> Dict[str,str]:
     global _IMAGE_MAP
-    if _IMAGE_MAP is not None:
-        return _IMAGE_MAP
     ROOT = Path(__file__).resolve().parents[1]
     path = ROOT / "data" / "images.json"
-    if not path.exists():
-        _IMAGE_MAP = {}
-        return _IMAGE_MAP
     try:
-        _IMAGE_MAP = json.loads(path.read_text(encoding="utf-8"))
-        if not isinstance(_IMAGE_MAP, dict):
-            _IMAGE_MAP = {}
+        mtime = path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return {}
+    if _IMAGE_MAP[0] == mtime:
+        return _IMAGE_MAP[1]
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if not isinstance(data, dict):
+            data = {}
     except Exception:
-        _IMAGE_MAP = {}
-    return _IMAGE_MAP
+        data = {}
+    _IMAGE_MAP = (mtime, data)
+    return data
 
 def _local_image_for_slug(slug: str) -> str | None:
     """
@@ -44,13 +56,8 @@ def _local_image_for_slug(slug: str) -> str | None:
       site/assets/img/posts/<slug>.(jpg|jpeg|png|webp)
     Returns a site-relative URL or None.
     """
-    ROOT = Path(__file__).resolve().parents[1]
-    base = ROOT / "site" / "assets" / "img" / "posts"
-    for ext in (".jpg", ".jpeg", ".png", ".webp"):
-        p = base / f"{slug}{ext}"
-        if p.exists():
-            return f"/assets/img/posts/{slug}{ext}"
-    return None
+    p = local_source(slug)
+    return f"/assets/img/posts/{p.name}" if p else None
 
 def img_tag_from_url(url:str, w:int, h:int, alt:str) -> str:
     """Direct URL (local or remote) with a Picsum fallback if remote fails."""
@@ -69,16 +76,22 @@ def img_tag_fallback(topic:str, w:int, h:int, alt:str) -> str:
     return (f'<img src="{primary}" alt="{escape(alt)}" loading="lazy" '
             f'onerror="this.onerror=null;this.src=\'{fallback}\';">')
 
-def hero_img_for(slug: str, title: str, w: int, h: int) -> str:
+def hero_img_for(slug: str, title: str, w: int, h: int, base_prefix: str = "") -> str:
     """
     Priority:
+      0) responsive derivatives of 1) or 2) built by ssg.images (<picture> + srcset)
       1) local asset: /assets/img/posts/<slug>.(jpg|png|webp)
       2) images.json mapping by slug
       3) stock fallback
     """
+    derived = load_derivatives().get(slug)
+    if derived:
+        # Post heroes span the container and are the LCP element; cards sit in half of a 3/4 column
+        if w >= 1000: return picture_tag(derived, title, "(min-width: 1216px) 1152px, 100vw", base_prefix, eager=True)
+        return picture_tag(derived, title, "(min-width: 769px) 38vw, 100vw", base_prefix)
     local = _local_image_for_slug(slug)
     if local:
-        return f'<img src="{local}" alt="{escape(title)}" loading="lazy">'
+        return f'<img src="{base_prefix}{local}" alt="{escape(title)}" loading="lazy">'
     imap = load_image_map()
     mapped = imap.get(slug) or imap.get(slugify(slug))
     if mapped:
@@ -86,10 +99,9 @@ def hero_img_for(slug: str, title: str, w: int, h: int) -> str:
     return img_tag_fallback(title or slug, w, h, title)
 
 def prepare_dirs(ROOT: Path):
-    SITE = ROOT/"site"; POSTS = SITE/"posts"; DATA = ROOT/"data"
-    SITE.mkdir(exist_ok=True); POSTS.mkdir(parents=True, exist_ok=True); DATA.mkdir(exist_ok=True)
-    (SITE/".nojekyll").write_text("\n",encoding="utf-8")
-    (SITE/"assets"/"js").mkdir(parents=True, exist_ok=True)
+    SITE = site_dir(); POSTS = SITE/"posts"; DATA = ROOT/"data"
+    SITE.mkdir(parents=True, exist_ok=True); POSTS.mkdir(parents=True, exist_ok=True); DATA.mkdir(exist_ok=True)
+    write(SITE/".nojekyll", "\n")
     return SITE, POSTS, DATA
 
 def paginate(items:List[Dict], page:int, size:int=PAGE_SIZE):
@@ -126,7 +138,8 @@ def render_tags(base_prefix,tags:List[str])->str:
     if not tags: return '<span class="tag is-light">none</span>'
     return " ".join(f'<a class="tag is-link is-light" href="{base_prefix}/tag/{slugify(t)}/">{escape(t)}</a>' for t in tags)
 
-def render_sections(sections):
+def render_sections(sections, link=None):
+    """link: a linker.LinkSession that escapes paragraph text and adds internal links."""
     out=[]
     # Expand sections with H2/H3 variety and paragraph spacing
     for s in sections or []:
@@ -136,7 +149,7 @@ def render_sections(sections):
             out.append(f'<h2 id="{anchor}" class="title is-4">{h}</h2>')
         # paragraphs
         for p in s.get("paragraphs",[]) or []:
-            out.append(f"<p>{escape(p)}</p>")
+            out.append(f"<p>{link(p) if link else escape(p)}</p>")
         # optional bullets
         for lst in s.get("bullets",[]) or []:
             if isinstance(lst, list) and lst:
@@ -178,12 +191,28 @@ def render_related(base_prefix, related):
     items="".join(f'<li><a href="{base_prefix}/posts/{m["slug"]}/">{escape(m["title"])}</a></li>' for m in related[:6])
     return f'<div class="box"><h2 class="title is-5">Related posts</h2><ul>{items}</ul></div>'
 
-def _cards_for(posts_meta, base_prefix):
-    cards=[]
-    for m in posts_meta:
-        slug=m["slug"]; title=escape(m["title"]); cat=escape(m["category"]); cat_slug=slugify(m["category"])
-        img_html = hero_img_for(slug, m.get("title") or slug, 600, 338)
-        cards.append(f"""
+# Marked so python -m ssg merge can swap in related lists computed over every shard's posts
+_RELATED_MARKS=(("<!--related-inline-->","<!--/related-inline-->"), ("<!--related-->","<!--/related-->"))
+
+def related_blocks(base_prefix, related_list) -> Dict:
+    """post.html's intext_related (top 3, in the body) and related_html (box), each between _RELATED_MARKS."""
+    rel=[f'<a href="{base_prefix}/posts/{r["slug"]}/">{escape(r["title"])}</a>' for r in related_list[:3]]
+    intext_related = "<p><em>Related:</em> " + " • ".join(rel) + "</p>" if rel else ""
+    (a, b), (c, d) = _RELATED_MARKS
+    return {"intext_related": a + intext_related + b, "related_html": c + render_related(base_prefix, related_list) + d}
+
+def patch_related(path, base_prefix, related_list) -> bool:
+    """Swap a rendered post page's related blocks for related_list's; True when the page changed."""
+    page=Path(path).read_text(encoding="utf-8"); out=page
+    for (start, end), block in zip(_RELATED_MARKS, related_blocks(base_prefix, related_list).values()):
+        i=out.find(start); j=out.find(end, i)
+        if i >= 0 and j >= 0: out=out[:i] + block + out[j + len(end):]
+    return out != page and write(path, out)
+
+def _card(index, m, base_prefix):
+    slug=m["slug"]; title=escape(m["title"]); cat=escape(m["category"]); cat_slug=index.slug(m["category"])
+    img_html = hero_img_for(slug, m.get("title") or slug, 600, 338, base_prefix)
+    return f"""
 <div class="column is-half">
   <div class="card">
     <div class="card-image"><figure class="image">{img_html}</figure></div>
@@ -193,31 +222,19 @@ def _cards_for(posts_meta, base_prefix):
       <p><a class="button is-link is-light is-small" href="{base_prefix}/posts/{slug}/">Read →</a></p>
     </div>
   </div>
-</div>""")
-    return "\n".join(cards) if cards else "<p>No posts yet.</p>"
+</div>"""
 
-def _search_bar_html(base_prefix):
-    return f"""
-<div class="field has-addons" style="margin:1rem 0">
-  <div class="control is-expanded"><input id="q" class="input" type="search" placeholder="Search posts…" aria-label="Search" /></div>
-  <div class="control"><button id="qbtn" class="button is-link">Search</button></div>
-</div>
-<div id="qresults" class="content"></div>
-<script>
-(function(){{
-  const q=document.getElementById('q'), btn=document.getElementById('qbtn'), out=document.getElementById('qresults'); let idx=[];
-  fetch('{base_prefix}/search.json').then(r=>r.json()).then(d=>idx=d);
-  function run(){{
-    const term=(q.value||'').toLowerCase().trim(); if(!term){{out.innerHTML='';return;}}
-    const parts=term.split(/\\s+/);
-    const res=idx.map(it=>{{let score=0; const hay=(it.title+' '+it.category+' '+it.tags.join(' ')+' '+it.text).toLowerCase(); for(const p of parts) if(hay.includes(p)) score+=1; return [score,it];}})
-      .filter(x=>x[0]>0).sort((a,b)=>b[0]-a[0]).slice(0,20).map(x=>x[1]);
-    out.innerHTML = res.length ? '<ul>'+res.map(it=>`<li><a href="{base_prefix}/posts/${{it.slug}}/">${{it.title}}</a> <span class="tag is-light">${{it.category}}</span></li>`).join('') : '<p><em>No results</em></p>';
-  }}
-  btn.addEventListener('click',run); q.addEventListener('keydown',e=>{{if(e.key==='Enter') run();}});
-}})();
-</script>
-"""
+def _list_item(m, base_prefix):
+    return f'<p>• <a href="{base_prefix}/posts/{m["slug"]}/">{escape(m["title"])}</a></p>'
+
+def _archive_row(m, base_prefix):
+    return f'<p>• <a href="{base_prefix}/posts/{m["slug"]}/">{escape(m["title"])}</a> <span class="tag is-light">{escape(m["category"])}</span></p>'
+
+def _cards_for(posts_meta, base_prefix, index):
+    """Homepage/pagination cards; each post's card renders once per build (SiteIndex fragment cache)."""
+    make = lambda m, bp: _card(index, m, bp)
+    cards=[index.fragment("card", m, base_prefix, make) for m in posts_meta]
+    return "\n".join(cards) if cards else "<p>No posts yet.</p>"
 
 # ----------------- JSON-LD helpers -----------------
 
@@ -244,7 +261,7 @@ def jsonld_webpage(title, site_url, url):
     }
     return '<script type="application/ld+json">'+json.dumps(data)+'</script>'
 
-def jsonld_article(title, site_url, slug, author_name, published_iso, tags, faq_items=None):
+def jsonld_article(title, site_url, slug, author_name, published_iso, tags, faq_items=None, modified_iso=None):
     url=f"{site_url.rstrip('/')}/posts/{slug}/"
     data = {
         "@context":"https://schema.org",
@@ -252,7 +269,7 @@ def jsonld_article(title, site_url, slug, author_name, published_iso, tags, faq_
         "headline": title,
         "author": {"@type":"Person","name": author_name},
         "datePublished": published_iso,
-        "dateModified": published_iso,
+        "dateModified": modified_iso or published_iso,
         "mainEntityOfPage": {"@type":"WebPage","@id": url},
         "keywords": ", ".join(tags or [])
     }
@@ -273,279 +290,229 @@ def jsonld_article(title, site_url, slug, author_name, published_iso, tags, faq_
 # ----------------- Build main pages -----------------
 
 def rebuild_index(brand, desc, site_url, base_prefix, theme, posts_meta, analytics_html):
-    ROOT=Path(__file__).resolve().parents[1]; SITE=ROOT/"site"
-    (SITE/"assets"/"js").mkdir(parents=True, exist_ok=True)
-    write_telemetry_js(SITE, base_prefix="")
-    items=posts_meta[:]
+    SITE=site_dir()
+    index=SiteIndex.of(posts_meta); items=index.newest
 
-    page_items, page, total = paginate(items[::-1], 1, PAGE_SIZE)
-    post_cards=_cards_for(page_items, base_prefix)
+    page_items, page, total = paginate(items, 1, PAGE_SIZE)
+    post_cards=_cards_for(page_items, base_prefix, index)
     pagination=pagination_html(base_prefix, page, total, "")
 
-    cat_counts={}; tag_counts={}
-    for m in posts_meta:
-        cat_counts[m["category"]]=cat_counts.get(m["category"],0)+1
-        for t in m["tags"]: tag_counts[t]=tag_counts.get(t,0)+1
-    category_list = "\n".join(f'<p>• <a href="{base_prefix}/category/{slugify(c)}/">{escape(c)}</a> <span class="tag is-light">{n}</span></p>' for c,n in sorted(cat_counts.items(), key=lambda x:(-x[1],x[0].lower()))) or "<p><em>None yet</em></p>"
-    tag_cloud = " ".join(f'<a class="tag is-link is-light" href="{base_prefix}/tag/{slugify(t)}/">{escape(t)} ({n})</a>' for t,n in sorted(tag_counts.items(), key=lambda x:(-x[1],x[0].lower()))) or '<span class="tag is-light">none</span>'
-
-    html_out = INDEX_SHELL.format(
-      brand=escape(brand), desc=escape(desc), site_url=site_url.rstrip("/"), theme_css=THEMES["bulma"]["css"],
-      analytics=analytics_html, jsonld=jsonld_site(brand, site_url),
-      container_open=THEMES["bulma"]["container_open"], container_close=THEMES["bulma"]["container_close"],
-      post_cards=post_cards, category_list=category_list, tag_cloud=tag_cloud,
-      year=datetime.date.today().year, base_prefix=base_prefix, search_bar=_search_bar_html(base_prefix), pagination=pagination
-    )
-    (SITE/"index.html").write_text(html_out, encoding="utf-8")
+    category_list = "\n".join(f'<p>• <a href="{base_prefix}/category/{index.category_slugs[c]}/">{escape(c)}</a> <span class="tag is-light">{n}</span></p>' for c,n in index.category_counts) or "<p><em>None yet</em></p>"
+    tag_cloud = " ".join(f'<a class="tag is-link is-light" href="{base_prefix}/tag/{index.tag_slugs[t]}/">{escape(t)} ({n})</a>' for t,n in index.tag_counts) or '<span class="tag is-light">none</span>'
+
+    ctx = dict(site_context(brand, base_prefix, analytics_html), desc=desc, canonical=f"{site_url.rstrip('/')}/",
+               jsonld=jsonld_site(brand, site_url), category_list=category_list, tag_cloud=tag_cloud)
+    with profile.phase("index", "page"):
+        html_out = render("index.html", **ctx, post_cards=post_cards, pagination=pagination)
+        write(SITE/"index.html", html_out)
+    owns(SITE/"page")
 
     if total>1:
         for n in range(2,total+1):
-            page_items, _, _ = paginate(items[::-1], n, PAGE_SIZE)
-            post_cards=_cards_for(page_items, base_prefix); pagination=pagination_html(base_prefix, n, total, "")
-            out = INDEX_SHELL.format(
-              brand=escape(brand), desc=escape(desc), site_url=site_url.rstrip("/"), theme_css=THEMES["bulma"]["css"],
-              analytics=analytics_html, jsonld=jsonld_site(brand, site_url),
-              container_open=THEMES["bulma"]["container_open"], container_close=THEMES["bulma"]["container_close"],
-              post_cards=post_cards, category_list=category_list, tag_cloud=tag_cloud,
-              year=datetime.date.today().year, base_prefix=base_prefix, search_bar=_search_bar_html(base_prefix), pagination=pagination
-            )
-            folder = SITE/"page"/str(n); folder.mkdir(parents=True, exist_ok=True); (folder/"index.html").write_text(out, encoding="utf-8")
-
-def write_sitemap_and_robots(site_url, posts_meta):
-    ROOT=Path(__file__).resolve().parents[1]; SITE=ROOT/"site"; site_url=site_url.rstrip("/")
-    urls=[f"{site_url}/"]
-    for m in posts_meta: urls.append(f"{site_url}/posts/{m['slug']}/")
-    cats=sorted({m["category"] for m in posts_meta})
-    for c in cats: urls.append(f"{site_url}/category/{slugify(c)}/")
-    tags=sorted({t for m in posts_meta for t in m["tags"]})
-    for t in tags: urls.append(f"{site_url}/tag/{slugify(t)}/")
-    urls += [f"{site_url}/archive.html", f"{site_url}/privacy.html", f"{site_url}/disclosure.html", f"{site_url}/about.html", f"{site_url}/contact.html", f"{site_url}/feed.xml"]
-    out=['<?xml version="1.0" encoding="UTF-8"?>','<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'] + [f"  <url><loc>{u}</loc></url>" for u in urls] + ["</urlset>\n"]
-    (SITE/"sitemap.xml").write_text("\n".join(out), encoding="utf-8")
-    (SITE/"robots.txt").write_text(f"User-agent: *\nAllow: /\nSitemap: {site_url}/sitemap.xml\n", encoding="utf-8")
-
-def build_category_pages(brand, site_url, base_prefix, theme, posts_meta, analytics_html):
-    ROOT=Path(__file__).resolve().parents[1]; SITE=ROOT/"site"; root=SITE/"category"
-    by_cat={}
-    for m in posts_meta: by_cat.setdefault(m["category"],[]).append(m)
-    for cat, items in by_cat.items():
-        items=items[:]
-        page_items, page, total = paginate(items[::-1], 1, PAGE_SIZE)
-        folder=root/slugify(cat); folder.mkdir(parents=True, exist_ok=True)
-        body=f"<h2 class='title is-4'>{escape(cat)}</h2>" + "".join(f'<p>• <a href="{base_prefix}/posts/{m["slug"]}/">{escape(m["title"])}</a></p>' for m in page_items) + pagination_html(base_prefix, page, total, f"category/{slugify(cat)}")
-        html_out = PAGE_TPL.format(title=f"{cat} — Category", brand=escape(brand), site_url=site_url.rstrip("/"), slug="", theme_css=THEMES["bulma"]["css"], analytics=analytics_html, base_prefix=base_prefix, body_html=body, year=datetime.date.today().year, container_open=THEMES["bulma"]["container_open"], container_close=THEMES["bulma"]["container_close"], jsonld=jsonld_webpage(f"Category: {cat}", site_url, f"{site_url.rstrip('/')}/category/{slugify(cat)}/"))
-        (folder/"index.html").write_text(html_out, encoding="utf-8")
-        if total>1:
-            for n in range(2,total+1):
-                page_items, _, _ = paginate(items[::-1], n, PAGE_SIZE)
-                body=f"<h2 class='title is-4'>{escape(cat)}</h2>" + "".join(f'<p>• <a href="{base_prefix}/posts/{m["slug"]}/">{escape(m["title"])}</a></p>' for m in page_items) + pagination_html(base_prefix, n, total, f"category/{slugify(cat)}")
-                pdir = folder/"page"/str(n); pdir.mkdir(parents=True, exist_ok=True)
-                (pdir/"index.html").write_text(PAGE_TPL.format(title=f"{cat} — Category", brand=escape(brand), site_url=site_url.rstrip("/"), slug="", theme_css=THEMES["bulma"]["css"], analytics=analytics_html, base_prefix=base_prefix, body_html=body, year=datetime.date.today().year, container_open=THEMES["bulma"]["container_open"], container_close=THEMES["bulma"]["container_close"], jsonld=jsonld_webpage(f"Category: {cat}", site_url, f"{site_url.rstrip('/')}/category/{slugify(cat)}/page/{n}/")), encoding="utf-8")
-
-def build_tag_pages(brand, site_url, base_prefix, theme, posts_meta, analytics_html):
-    ROOT=Path(__file__).resolve().parents[1]; SITE=ROOT/"site"; root=SITE/"tag"
-    by_tag={}
-    for m in posts_meta:
-        for t in m["tags"]: by_tag.setdefault(t,[]).append(m)
-    for t, items in by_tag.items():
-        items=items[:]
-        page_items, page, total = paginate(items[::-1], 1, PAGE_SIZE)
-        folder=root/slugify(t); folder.mkdir(parents=True, exist_ok=True)
-        body=f"<h2 class='title is-4'>Tag: {escape(t)}</h2>" + "".join(f'<p>• <a href="{base_prefix}/posts/{m["slug"]}/">{escape(m["title"])}</a></p>' for m in page_items) + pagination_html(base_prefix, page, total, f"tag/{slugify(t)}")
-        html_out = PAGE_TPL.format(title=f"{t} — Tag", brand=escape(brand), site_url=site_url.rstrip("/"), slug="", theme_css=THEMES["bulma"]["css"], analytics=analytics_html, base_prefix=base_prefix, body_html=body, year=datetime.date.today().year, container_open=THEMES["bulma"]["container_open"], container_close=THEMES["bulma"]["container_close"], jsonld=jsonld_webpage(f"Tag: {t}", site_url, f"{site_url.rstrip('/')}/tag/{slugify(t)}/"))
-        (folder/"index.html").write_text(html_out, encoding="utf-8")
-        if total>1:
-            for n in range(2,total+1):
-                page_items, _, _ = paginate(items[::-1], n, PAGE_SIZE)
-                body=f"<h2 class='title is-4'>Tag: {escape(t)}</h2>" + "".join(f'<p>• <a href="{base_prefix}/posts/{m["slug"]}/">{escape(m["title"])}</a></p>' for m in page_items) + pagination_html(base_prefix, n, total, f"tag/{slugify(t)}")
-                pdir = folder/"page"/str(n); pdir.mkdir(parents=True, exist_ok=True)
-                (pdir/"index.html").write_text(PAGE_TPL.format(title=f"{t} — Tag", brand=escape(brand), site_url=site_url.rstrip("/"), slug="", theme_css=THEMES["bulma"]["css"], analytics=analytics_html, base_prefix=base_prefix, body_html=body, year=datetime.date.today().year, container_open=THEMES["bulma"]["container_open"], container_close=THEMES["bulma"]["container_close"], jsonld=jsonld_webpage(f"Tag: {t}", site_url, f"{site_url.rstrip('/')}/tag/{slugify(t)}/page/{n}/")), encoding="utf-8")
-
-def write_search_index(posts_meta):
-    ROOT=Path(__file__).resolve().parents[1]; SITE=ROOT/"site"; POSTS=SITE/"posts"
+            with profile.phase("index", "page"):
+                page_items, _, _ = paginate(items, n, PAGE_SIZE)
+                post_cards=_cards_for(page_items, base_prefix, index); pagination=pagination_html(base_prefix, n, total, "")
+                out = render("index.html", **ctx, post_cards=post_cards, pagination=pagination)
+                write(SITE/"page"/str(n)/"index.html", out)
+
+def write_sitemap_and_robots(site_url, posts_meta, lastmod=None):
+    """
+    Sitemap index (sitemap.xml) + child sitemaps per kind, streamed and split at
+    the protocol limits, each with a .xml.gz twin. lastmod: {slug: ISO date}
+    of each post's last content change; listings take their newest member's.
+    """
+    SITE=site_dir(); site_url=site_url.rstrip("/")
+    index=SiteIndex.of(posts_meta); lastmod=lastmod or {}
+    newest=lambda items: max((lastmod.get(m["slug"]) or "" for m in items), default="") or None
+    files=[]
+    w=SitemapWriter(SITE, site_url, "posts")
+    for m in index.posts: w.add(f"{site_url}/posts/{m['slug']}/", lastmod.get(m["slug"]))
+    files+=w.close()
+    w=SitemapWriter(SITE, site_url, "categories")
+    for c in index.category_names: w.add(f"{site_url}/category/{index.category_slugs[c]}/", newest(index.by_category[c]))
+    files+=w.close()
+    w=SitemapWriter(SITE, site_url, "tags")
+    for t in index.tag_names: w.add(f"{site_url}/tag/{index.tag_slugs[t]}/", newest(index.by_tag[t]))
+    files+=w.close()
+    w=SitemapWriter(SITE, site_url, "pages"); site_lastmod=newest(index.posts)
+    for u, mod in [(f"{site_url}/", site_lastmod), (f"{site_url}/archive.html", site_lastmod), (f"{site_url}/privacy.html", None), (f"{site_url}/disclosure.html", None), (f"{site_url}/about.html", None), (f"{site_url}/contact.html", None), (f"{site_url}/feed.xml", site_lastmod), (f"{site_url}/feed.json", site_lastmod)]:
+        w.add(u, mod)
+    files+=w.close()
+    write_sitemap_index(SITE, site_url, files)
+    owns(SITE/"sitemap-", prefix=True)   # child sitemaps this build no longer needs
+    write(SITE/"robots.txt", f"User-agent: *\nAllow: /\nSitemap: {site_url}/sitemap.xml\n")
+
+def build_category_pages(brand, site_url, base_prefix, theme, posts_meta, analytics_html, only=None):
+    """only: optional set of category slugs to render (incremental builds)."""
+    SITE=site_dir(); root=SITE/"category"
+    index=SiteIndex.of(posts_meta)
+    site = site_context(brand, base_prefix, analytics_html)
+    for cat, cat_slug in index.category_slugs.items():
+        if only is not None and cat_slug not in only: continue
+        _write_term_pages(site, site_url, index, "category.html", root, "category", cat, cat_slug, f"{cat} — Category", f"Category: {cat}", index.newest_in_category(cat))
+
+def build_tag_pages(brand, site_url, base_prefix, theme, posts_meta, analytics_html, only=None):
+    """only: optional set of tag slugs to render (incremental builds)."""
+    SITE=site_dir(); root=SITE/"tag"
+    index=SiteIndex.of(posts_meta)
+    site = site_context(brand, base_prefix, analytics_html)
+    for t, tag_slug in index.tag_slugs.items():
+        if only is not None and tag_slug not in only: continue
+        _write_term_pages(site, site_url, index, "tag.html", root, "tag", t, tag_slug, f"{t} — Tag", f"Tag: {t}", index.newest_with_tag(t))
+
+def _write_term_pages(site, site_url, index, template, root, kind, term, term_slug, title, label, items):
+    """Paginated listing (newest first) for one category/tag: <root>/<slug>/index.html + page/<n>/index.html."""
+    base_url=f"{site_url.rstrip('/')}/{kind}/{term_slug}/"
+    total=max(1, math.ceil(len(items)/PAGE_SIZE))
+    for n in range(1,total+1):
+        with profile.phase(kind, "page"):
+            page_items, _, _ = paginate(items, n, PAGE_SIZE)
+            url = base_url if n==1 else f"{base_url}page/{n}/"
+            post_items = "".join(index.fragment("item", m, site["base_prefix"], _list_item) for m in page_items)
+            out = render(template, **site, title=title, term=term, post_items=post_items, canonical=url,
+                         pagination=pagination_html(site["base_prefix"], n, total, f"{kind}/{term_slug}"),
+                         jsonld=jsonld_webpage(label, site_url, url))
+            folder = root/term_slug if n==1 else root/term_slug/"page"/str(n)
+            write(folder/"index.html", out)
+    owns(root/term_slug)
+
+def write_search_index(posts_meta, records):
+    """
+    records: {slug: post_record(...)} as returned by write_post.
+    Writes the sharded inverted index under site/search/ (see ssg/search.py).
+    """
+    SITE=site_dir()
+    docs, postings = build_index((m, records[m["slug"]]) for m in SiteIndex.of(posts_meta) if m["slug"] in records)
+    write_index(SITE/"search", docs, postings)
+
+def write_feed(brand, site_url, posts_meta, records, lastmod=None):
+    """
+    feed.xml (Atom) + feed.json (JSON Feed) with the newest posts, and RFC 5005
+    archive documents for older ones (see ssg/feeds.py). Entries are dated from
+    each post's first-published date and lastmod {slug: last content change}.
+    """
+    SITE=site_dir(); site_url=site_url.rstrip("/"); lastmod=lastmod or {}
     items=[]
-    for m in posts_meta:
-        path=POSTS/m["slug"]/ "index.html"
-        if not path.exists(): continue
-        html_txt=path.read_text(encoding="utf-8")
-        m1=re.search(r"<p>(.*?)</p>", html_txt, re.S); snippet=(m1.group(1) if m1 else "")[:500]
-        heads=" ".join(h.strip() for h in re.findall(r"<h2[^>]*>(.*?)</h2>", html_txt, re.S))
-        strip=lambda s: re.sub(r"<.*?>"," ", s or "")
-        items.append({"slug": m["slug"], "title": re.sub(r"\s+"," ", strip(m["title"])).strip(), "url": f"/posts/{m['slug']}/", "category": m["category"], "tags": m["tags"], "text": re.sub(r"\s+"," ", strip(heads+" "+snippet)).strip()})
-    (SITE/"search.json").write_text(json.dumps(items, ensure_ascii=False), encoding="utf-8")
-
-def write_feed(brand, site_url, posts_meta):
-    ROOT=Path(__file__).resolve().parents[1]; SITE=ROOT/"site"; POSTS=SITE/"posts"; site_url=site_url.rstrip("/")
-    entries=[]
-    for m in posts_meta[::-1][:20]:
-        slug=m["slug"]; url=f"{site_url}/posts/{slug}/"
-        path=POSTS/slug/"index.html"
-        if not path.exists(): continue
-        txt=path.read_text(encoding="utf-8")
-        m1=re.search(r"<p>(.*?)</p>", txt, re.S); import html as _html
-        summary=_html.escape(re.sub(r"<.*?>","", m1.group(1) if m1 else "")[:300])
-        updated=datetime.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
-        entries.append(f"""
-  <entry>
-    <title>{_html.escape(m["title"])}</title>
-    <link href="{url}"/>
-    <id>{url}</id>
-    <updated>{updated}</updated>
-    <summary>{summary}</summary>
-  </entry>""")
-    feed=f"""<?xml version="1.0" encoding="utf-8"?>
-<feed xmlns="http://www.w3.org/2005/Atom">
-  <title>{html.escape(brand)}</title>
-  <link href="{site_url}/feed.xml" rel="self"/>
-  <link href="{site_url}/"/>
-  <updated>{datetime.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")}</updated>
-  <id>{site_url}/</id>
-  {''.join(entries)}
-</feed>
-"""
-    (SITE/"feed.xml").write_text(feed, encoding="utf-8")
+    for m in SiteIndex.of(posts_meta):
+        rec=records.get(m["slug"])
+        if not rec: continue
+        items.append({"url": f"{site_url}/posts/{m['slug']}/", "title": m["title"], "summary": rec["summary"],
+                      "published": rec["published"], "updated": lastmod.get(m["slug"]) or rec["published"], "tags": m["tags"]})
+    write_feeds(SITE, brand, site_url, items)
 
 def write_404(brand, site_url, base_prefix, theme, analytics_html):
-    ROOT=Path(__file__).resolve().parents[1]; SITE=ROOT/"site"
-    html_out = NOT_FOUND_TPL.format(brand=escape(brand), theme_css=THEMES["bulma"]["css"], base_prefix=base_prefix,
-          container_open=THEMES["bulma"]["container_open"], container_close=THEMES["bulma"]["container_close"])
-    (SITE/"404.html").write_text(html_out, encoding="utf-8")
+    SITE=site_dir()
+    with profile.phase("404", "page"):
+        html_out = render("404.html", **site_context(brand, base_prefix))
+        write(SITE/"404.html", html_out)
 
 def _page_jsonld(title, site_url, slug_html):
     url = f"{site_url.rstrip('/')}/{slug_html}"
     return jsonld_webpage(title, site_url, url)
 
 def write_standard_pages(brand, site_url, base_prefix, theme, analytics_html, audience="readers", domain="example.com"):
-    # Rich, scannable copy for core pages
-    PAGES={
-      "about":{
-        "title":"About",
-        "body":f"""
-<h2 class="title is-4">Our mission</h2>
-<p><strong>{escape(brand)}</strong> publishes practical, evidence-aware guides and reviews for {escape(audience)}. We value clarity, useful details, and honest recommendations.</p>
-
-<h2 class="title is-4">Editorial standards</h2>
-<ul>
-  <li>We cite credible sources and link to primary research where relevant.</li>
-  <li>We disclose affiliate relationships and avoid pay-to-play rankings.</li>
-  <li>We update content as products and evidence evolve.</li>
-</ul>
-
-<h2 class="title is-4">Who we are</h2>
-<p>Independent editors and testers who care about helping you buy once, buy well.</p>
-"""
-      },
-      "contact":{
-        "title":"Contact",
-        "body":f"""
-<p>Email us: <a href="mailto:contact@{escape(domain)}">contact@{escape(domain)}</a></p>
-<p>We read every message and reply when we can. For partnership requests, include timelines, product details, and any embargo info.</p>
-"""
-      },
-      "privacy":{
-        "title":"Privacy",
-        "body":"""
-<h2 class="title is-4">Overview</h2>
-<p>We respect your privacy. This site may use cookies or analytics to understand traffic and improve the experience. We do not sell personal data.</p>
-
-<h2 class="title is-4">Analytics</h2>
-<p>We measure page views and clicks in aggregate to see what’s helpful. You can block analytics with your browser or privacy tools.</p>
-
-<h2 class="title is-4">Cookies</h2>
-<p>Cookies may be used to remember preferences or attribute affiliate visits. You can clear or block cookies anytime in your browser settings.</p>
-"""
-      },
-      "disclosure":{
-        "title":"Affiliate Disclosure",
-        "body":"""
-<p>Some links on this site are affiliate links. If you purchase through them, we may earn a commission—at no extra cost to you. We only recommend products we believe bring genuine value.</p>
-<p><em>As an Amazon Associate we earn from qualifying purchases.</em></p>
-"""
-      }
+    # Rich, scannable copy for core pages lives in templates/pages/<name>.html
+    PAGES={"about":"About", "contact":"Contact", "privacy":"Privacy", "disclosure":"Affiliate Disclosure"}
+    SITE=site_dir()
+    site = site_context(brand, base_prefix, analytics_html)
+    for slug_name, title in PAGES.items():
+        with profile.phase("standard", "page"):
+            body = render(f"pages/{slug_name}.html", brand=brand, audience=audience, domain=domain)
+            out = render("page.html", **site, title=title, body_html=body,
+                         canonical=f"{site_url.rstrip('/')}/{slug_name}.html",
+                         jsonld=_page_jsonld(title, site_url, f"{slug_name}.html"))
+            write(SITE/f"{slug_name}.html", out)
+
+def post_record(payload, published=None) -> Dict:
+    """
+    Structured facts about a post, straight from its payload (no HTML parsing):
+    what the search index and feed need. write_post returns it.
+    """
+    data=payload["data"]; source=payload.get("source")
+    if source:
+        # Markdown posts: headings/word count come from the front-matter loader, no body conversion
+        headings, word_count = source["headings"], source["words"]
+    else:
+        sections=data.get("sections",[]) or []
+        headings=[s.get("heading","") for s in sections if s.get("heading")] + (["FAQ"] if data.get("faq") else [])
+        texts=[data.get("summary","")]
+        for s in sections:
+            texts += s.get("paragraphs",[]) or []
+            for lst in s.get("bullets",[]) or []: texts += lst if isinstance(lst, list) else []
+        for it in data.get("faq",[]) or []: texts += [it.get("q",""), it.get("a","")]
+        word_count = sum(len(str(t).split()) for t in texts)
+    return {
+        "slug": payload["slug"], "title": payload["title"], "category": payload["category"], "tags": payload["tags"],
+        "summary": data.get("summary") or data.get("meta_description",""), "headings": headings,
+        "published": published or payload.get("date") or datetime.date.today().isoformat(),
+        "word_count": word_count,
     }
-    ROOT=Path(__file__).resolve().parents[1]; SITE=ROOT/"site"
-    for slug_name, meta in PAGES.items():
-        out = PAGE_TPL.format(
-          title=meta["title"], brand=escape(brand), site_url=site_url.rstrip("/"),
-          slug=slug_name, theme_css=THEMES["bulma"]["css"], analytics=analytics_html,
-          base_prefix=base_prefix, body_html=meta["body"], year=datetime.date.today().year,
-          container_open=THEMES["bulma"]["container_open"], container_close=THEMES["bulma"]["container_close"],
-          jsonld=_page_jsonld(meta["title"], site_url, f"{slug_name}.html")
-        )
-        (SITE/f"{slug_name}.html").write_text(out, encoding="utf-8")
 
 def write_post(brand, site_url, base_prefix, payload, amazon_tag, theme, related_list, analytics_html):
-    ROOT=Path(__file__).resolve().parents[1]; SITE=ROOT/"site"; POSTS=SITE/"posts"
-    slug=payload["slug"]; data=payload["data"]; category=payload["category"]; tags=payload["tags"]; title=payload["title"]
-    today=datetime.date.today().isoformat()
-    aff_url=f"https://www.amazon.com/dp/B000000000?tag={amazon_tag}"
-    inline_cta=cta_banner("Our top pick is in stock with fast shipping.", aff_url)
-    top_pick_box=product_box(data.get("product_name","Our Pick"), data.get("product_blurb","Solid choice for most."), aff_url)
-
-    # Expanded body content (intro + sections + FAQ)
-    body=[]
-    if data.get("summary"): body.append(f"<p><em>{escape(data['summary'])}</em></p>")
-    # Encourage longer content by repeating sections with details if present
-    body.append(render_sections(data.get("sections",[])))
-    body.append(render_faq(data.get("faq",[])))
-    # Internal related inline links
-    links=[f'<a href="{base_prefix}/posts/{r["slug"]}/">{escape(r["title"])}</a>' for r in related_list[:3]]
-    intext_related = "<p><em>Related:</em> " + " • ".join(links) + "</p>" if links else ""
-
-    body_html="\n".join([b for b in body if b])
-    sources_html=render_sources(data.get("sources",[]))
-
-    a_name = escape(payload.get("author_name") or "Staff Writer")
-    a_bio  = escape(payload.get("author_bio") or "")
-    a_url  = (payload.get("author_url") or "").strip()
-    author_link = f'• <a href="{escape(a_url)}" target="_blank" rel="nofollow noopener">Profile</a>' if a_url else ""
-
-    hero_img_tag = hero_img_for(slug, title, 1200, 630)
-
-    jsonld = jsonld_article(
-        title=title, site_url=site_url, slug=slug,
-        author_name=a_name, published_iso=today, tags=tags, faq_items=data.get("faq",[])
-    )
-
-    html_out = POST_TPL.format(
-        title=escape(title), brand=escape(brand),
-        meta_desc=escape(data.get("meta_description","")),
-        site_url=site_url.rstrip("/"), slug=slug, base_prefix=base_prefix,
-        theme_css=THEMES["bulma"]["css"], analytics=analytics_html, date=today,
-        hero_img_tag=hero_img_tag, jsonld=jsonld,
-        body_html=body_html, inline_cta=inline_cta, intext_related=intext_related, sources_html=sources_html,
-        top_pick_box=top_pick_box, comparison_table="", year=datetime.date.today().year,
-        container_open=THEMES["bulma"]["container_open"], container_close=THEMES["bulma"]["container_close"],
-        category=escape(category), cat_slug=slugify(category), tags_html=render_tags(base_prefix,tags),
-        related_html=render_related(base_prefix, related_list),
-        author_name=a_name, author_bio=a_bio, author_link=author_link,
-    )
-    folder=POSTS/slug; folder.mkdir(parents=True, exist_ok=True)
-    (folder/"index.html").write_text(html_out, encoding="utf-8")
-    return slug
+    with profile.phase("post", "page"):
+        SITE=site_dir(); POSTS=SITE/"posts"
+        slug=payload["slug"]; data=payload["data"]; category=payload["category"]; tags=payload["tags"]; title=payload["title"]
+        # Stored first-published / last-changed dates (build.py); never the build day once a post exists
+        today=payload.get("date") or datetime.date.today().isoformat(); updated=payload.get("updated") or today
+        aff_url=f"https://www.amazon.com/dp/B000000000?tag={amazon_tag}"
+        inline_cta=cta_banner("Our top pick is in stock with fast shipping.", aff_url)
+        top_pick_box=product_box(data.get("product_name","Our Pick"), data.get("product_blurb","Solid choice for most."), aff_url)
+
+        # Expanded body content (intro + sections + FAQ), or the converted Markdown body + product boxes
+        body=[]
+        if data.get("summary"): body.append(f"<p><em>{escape(data['summary'])}</em></p>")
+        if payload.get("source"):
+            md_html=render_body(payload["source"])
+            body.append(inject_blocks(md_html, data["products"]) if data.get("products") else md_html)
+        # Encourage longer content by repeating sections with details if present; paragraphs get auto-links
+        linker=current_linker(); autolinks=linker.session(slug, base_prefix) if linker else None
+        body.append(render_sections(data.get("sections",[]), autolinks))
+        body.append(render_faq(data.get("faq",[])))
+
+        body_html="\n".join([b for b in body if b])
+        sources_html=render_sources(data.get("sources",[]))
+
+        a_name = payload.get("author_name") or "Staff Writer"
+        a_bio  = payload.get("author_bio") or ""
+        a_url  = (payload.get("author_url") or "").strip()
+        author_link = f'• <a href="{escape(a_url)}" target="_blank" rel="nofollow noopener">Profile</a>' if a_url else ""
+
+        hero_img_tag = hero_img_for(slug, title, 1200, 630, base_prefix)
+
+        jsonld = jsonld_article(
+            title=title, site_url=site_url, slug=slug,
+            author_name=a_name, published_iso=today, tags=tags, faq_items=data.get("faq",[]), modified_iso=updated
+        )
+
+        url=f"{site_url.rstrip('/')}/posts/{slug}/"
+        html_out = render("post.html", **site_context(brand, base_prefix, analytics_html),
+            title=title, meta_desc=data.get("meta_description",""), url=url, canonical=url, date=today, updated=updated,
+            hero_img_tag=hero_img_tag, jsonld=jsonld,
+            body_html=body_html, inline_cta=inline_cta, sources_html=sources_html, **related_blocks(base_prefix, related_list),
+            top_pick_box=top_pick_box, comparison_table="",
+            category=category, cat_slug=slugify(category), tags_html=render_tags(base_prefix,tags),
+            author_name=a_name, author_bio=a_bio, author_link=author_link,
+        )
+        write(POSTS/slug/"index.html", html_out)
+        owns(POSTS/slug)
+        rec=post_record(payload, published=today)
+        if autolinks is not None: rec["links"]=autolinks.slugs
+        return rec
 
 def write_archive_pages(brand, site_url, base_prefix, theme, posts_meta, analytics_html):
-    ROOT=Path(__file__).resolve().parents[1]; SITE=ROOT/"site"
-    by_cat={}
-    for m in posts_meta: by_cat.setdefault(m["category"],[]).append(m)
-    sections=["<h2 class='title is-4'>All posts (A–Z)</h2>"]
-    for m in sorted(posts_meta, key=lambda x:x["title"].lower()):
-        sections.append(f'<p>• <a href="{base_prefix}/posts/{m["slug"]}/">{escape(m["title"])}</a> <span class="tag is-light">{escape(m["category"])}</span></p>')
-    sections.append("<hr/><h2 class='title is-4'>By Category</h2>")
-    for cat in sorted(by_cat.keys(), key=lambda s:s.lower()):
-        sections.append(f"<h3 class='title is-6'>{escape(cat)}</h3>")
-        for m in sorted(by_cat[cat], key=lambda x:x["title"].lower()):
-            sections.append(f'<p>• <a href="{base_prefix}/posts/{m["slug"]}/">{escape(m["title"])}</a></p>')
-    body_html="\n".join(sections)
-    out = PAGE_TPL.format(
-        title="Archive", brand=escape(brand), site_url=site_url.rstrip("/"), slug="archive",
-        theme_css=THEMES["bulma"]["css"], analytics=analytics_html, base_prefix=base_prefix,
-        body_html=body_html, year=datetime.date.today().year,
-        container_open=THEMES["bulma"]["container_open"], container_close=THEMES["bulma"]["container_close"],
-        jsonld=_page_jsonld("Archive", site_url, "archive.html")
-    )
-    (SITE/"archive.html").write_text(out, encoding="utf-8")
-
-def write_telemetry_js(SITE:Path, base_prefix:str):
-    (SITE/"assets"/"js").mkdir(parents=True, exist_ok=True)
-    (SITE/"assets"/"js"/"telemetry.js").write_text("window.SS_trackSearch=function(q){console.log('search',q)};", encoding="utf-8")
\ No newline at end of file
+    with profile.phase("archive", "page"):
+        SITE=site_dir()
+        index=SiteIndex.of(posts_meta)
+        sections=["<h2 class='title is-4'>All posts (A–Z)</h2>"]
+        for m in index.by_title:
+            sections.append(index.fragment("archive", m, base_prefix, _archive_row))
+        sections.append("<hr/><h2 class='title is-4'>By Category</h2>")
+        for cat in index.categories_az:
+            sections.append(f"<h3 class='title is-6'>{escape(cat)}</h3>")
+            for m in index.category_az(cat):
+                sections.append(index.fragment("item", m, base_prefix, _list_item))
+        body_html="\n".join(sections)
+        out = render("page.html", **site_context(brand, base_prefix, analytics_html),
+            title="Archive", body_html=body_html, canonical=f"{site_url.rstrip('/')}/archive.html",
+            jsonld=_page_jsonld("Archive", site_url, "archive.html"))
+        write(SITE/"archive.html", out)
@@ -0,0 +1,66 @@
+# ssg/search.py — tokenized, prefix-sharded inverted search index (site/search/)
+import re, json, math, unicodedata
+from pathlib import Path
+from .output import write, owns
+
+# Per-field weights folded into each posting at build time
+FIELD_WEIGHTS = {"title": 3.0, "tags": 2.0, "category": 1.5, "headings": 1.5, "text": 1.0}
+# BM25F-style term-frequency saturation and length normalisation
+K1, B = 1.2, 0.5
+PREFIX_LEN = 2          # term shard key: search/t/<first two chars>.json
+DOC_SHARD = 1000        # docs per search/d/<n>.json
+MAX_POSTINGS = 500      # keep only the best-scoring docs per term so shards stay bounded
+_SPLIT = re.compile(r"[^a-z0-9]+").split
+STOPWORDS = frozenset("a an and are as at be by for from how in is it of on or the to vs what when which who why with".split())
+
+def tokenize(text: str) -> list:
+    """Must match tokens() in the client script: NFKD, strip accents, lowercase, split on non [a-z0-9]."""
+    text = text or ""
+    if not text.isascii():
+        text = "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+    return [t for t in _SPLIT(text.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+def _doc_fields(m, rec) -> dict:
+    return {"title": m["title"], "tags": " ".join(m["tags"]), "category": m["category"],
+            "headings": " ".join(rec["headings"]) if rec else "", "text": rec["summary"] if rec else ""}
+
+def build_index(posts):
+    """
+    posts: iterable of (meta, record). Returns (docs, postings) where docs[i] is
+    [slug, title, category] and postings maps term -> [[doc_id, score], ...] with
+    idf, field weights and length normalisation already applied.
+    """
+    docs, tfs, lengths = [], [], []
+    for m, rec in posts:
+        weighted, length = {}, 0
+        for field, text in _doc_fields(m, rec).items():
+            toks = tokenize(text); length += len(toks)
+            for t in toks: weighted[t] = weighted.get(t, 0.0) + FIELD_WEIGHTS[field]
+        docs.append([m["slug"], m["title"], m["category"]]); tfs.append(weighted); lengths.append(length)
+    n = len(docs); avg = (sum(lengths) / n) if n else 1.0
+    df = {}
+    for weighted in tfs:
+        for t in weighted: df[t] = df.get(t, 0) + 1
+    postings = {}
+    for doc_id, weighted in enumerate(tfs):
+        norm = K1 * (1 - B + B * lengths[doc_id] / (avg or 1.0))
+        for t, tf in weighted.items():
+            idf = math.log(1 + (n - df[t] + 0.5) / (df[t] + 0.5))
+            postings.setdefault(t, []).append([doc_id, round(idf * tf * (K1 + 1) / (tf + norm), 3)])
+    for t, plist in postings.items():
+        if len(plist) > MAX_POSTINGS:
+            plist.sort(key=lambda p: -p[1]); del plist[MAX_POSTINGS:]; plist.sort()
+    return docs, postings
+
+def write_index(root: Path, docs, postings):
+    """Write meta.json, term shards t/<prefix>.json and doc shards d/<n>.json under root."""
+    dump = lambda obj: json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+    shards = {}
+    for t in sorted(postings): shards.setdefault(t[:PREFIX_LEN], {})[t] = postings[t]
+    for key, terms in shards.items():
+        write(root/"t"/f"{key}.json", dump(terms))
+    for i in range(0, len(docs), DOC_SHARD):
+        write(root/"d"/f"{i // DOC_SHARD}.json", dump(docs[i:i+DOC_SHARD]))
+    meta = {"version": 1, "docs": len(docs), "doc_shard": DOC_SHARD, "prefix": PREFIX_LEN, "shards": sorted(shards)}
+    write(root/"meta.json", dump(meta))
+    owns(root)   # shards for terms/docs that no longer exist get pruned
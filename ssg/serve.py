@@ -0,0 +1,147 @@
+# ssg/serve.py — dev server: warm incremental rebuilds on file changes + live reload (python -m ssg serve --watch)
+import os, sys, time, threading, traceback
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from pathlib import Path
+from . import output, templates, styles
+
+ROOT = Path(__file__).resolve().parents[1]
+SERVE_DIR = ROOT/".cache"/"serve"/"site"
+POLL = 0.2              # seconds between watcher scans
+RELOAD_URL = "/__reload"
+_SNIPPET = f'<script>new EventSource("{RELOAD_URL}").onmessage=()=>location.reload()</script>'.encode("utf-8")
+
+def watched(args) -> dict:
+    """What a rebuild depends on, grouped by how the warm process must react."""
+    return {
+        "code": [ROOT/"ssg"/"templates.py"],                              # restart the process
+        "templates": [ROOT/"templates", ROOT/"static", ROOT/"vendor"],      # drop compiled templates + purged CSS
+        "content": [ROOT/args.keywords_file, ROOT/"content"/"posts",        # just rebuild
+                    ROOT/"site"/"assets"/"img"/"posts", ROOT/"data"/"images.json"],
+    }
+
+def snapshot(paths) -> dict:
+    """{path: (mtime_ns, size)} for files and every file under directories."""
+    out = {}
+    for p in paths:
+        for f in (p.rglob("*") if p.is_dir() else [p]):
+            try:
+                st = f.stat()
+            except FileNotFoundError:
+                continue
+            if f.is_file(): out[str(f)] = (st.st_mtime_ns, st.st_size)
+    return out
+
+class Reloader:
+    """Browsers hold an EventSource open; broadcast() bumps a version they wait on."""
+    def __init__(self):
+        self.version, self.cond = 0, threading.Condition()
+
+    def broadcast(self):
+        with self.cond:
+            self.version += 1; self.cond.notify_all()
+
+    def wait(self, seen: int, timeout: float = 15.0) -> int:
+        with self.cond:
+            self.cond.wait_for(lambda: self.version != seen, timeout=timeout)
+            return self.version
+
+def make_handler(site: Path, base_prefix: str, reloader: Reloader):
+    class Handler(SimpleHTTPRequestHandler):
+        def __init__(self, *a, **kw):
+            super().__init__(*a, directory=str(site), **kw)
+
+        def log_message(self, *a):
+            pass
+
+        def translate_path(self, path):
+            # Serve /REPO/... like GitHub Pages does; fall back to site/ for hand-placed files (images, favicon)
+            path = path.split("?", 1)[0]
+            if base_prefix and path.startswith(base_prefix): path = path[len(base_prefix):] or "/"
+            local = super().translate_path(path)
+            if not os.path.exists(local):
+                alt = ROOT/"site"/Path(local).relative_to(site)
+                if alt.exists(): return str(alt)
+            return local
+
+        def do_GET(self):
+            if self.path == RELOAD_URL: return self._events()
+            local = Path(self.translate_path(self.path))
+            if local.is_dir(): local = local/"index.html"
+            if local.suffix != ".html" or not local.is_file(): return super().do_GET()
+            body = local.read_bytes()
+            i = body.rfind(b"</body>")
+            body = body[:i] + _SNIPPET + body[i:] if i >= 0 else body + _SNIPPET
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body))); self.send_header("Cache-Control", "no-store")
+            self.end_headers(); self.wfile.write(body)
+
+        def _events(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream"); self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            seen = reloader.version
+            try:
+                while True:
+                    now = reloader.wait(seen)
+                    self.wfile.write(b"data: reload\n\n" if now != seen else b": ping\n\n"); self.wfile.flush()
+                    seen = now
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+    return Handler
+
+def _rebuild(pipeline, args, warm, reloader, reason: str):
+    t0 = time.perf_counter()
+    try:
+        pipeline.build(args, warm)
+    except Exception:
+        traceback.print_exc(); print("⚠ Rebuild failed; still serving the last good build")
+        return
+    print(f"🔁 Rebuilt in {time.perf_counter() - t0:.2f}s ({reason})")
+    reloader.broadcast()
+
+def serve(argv=None):
+    sys.path.insert(0, str(ROOT))
+    import build as pipeline   # the root build.py
+    ap = pipeline.parser(site_url_required=False)
+    ap.prog = "python -m ssg serve"
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8000)
+    ap.add_argument("--watch", action="store_true", help="Rebuild affected pages and live-reload browsers on changes")
+    ap.add_argument("--out", default=str(SERVE_DIR), help="Build directory for the dev server (keeps site/ untouched)")
+    args = ap.parse_args(argv)
+    args.site_url = args.site_url or f"http://{args.host}:{args.port}"
+    base_prefix = pipeline.base_prefix_for(args.site_url)
+
+    output.set_site_dir(args.out); output.site_dir().mkdir(parents=True, exist_ok=True)
+    warm, reloader = {}, Reloader()
+    _rebuild(pipeline, args, warm, reloader, "initial build")
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(output.site_dir(), base_prefix, reloader))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"🌐 Serving {output.site_dir()} at http://{args.host}:{args.port}{base_prefix}/" + (" (watching for changes)" if args.watch else ""))
+
+    groups = watched(args)
+    state = {g: snapshot(paths) for g, paths in groups.items()}
+    try:
+        while True:
+            time.sleep(POLL)
+            if not args.watch: continue
+            changed = []
+            for g, paths in groups.items():
+                now = snapshot(paths)
+                if now != state[g]: changed.append(g); state[g] = now
+            if not changed: continue
+            if "code" in changed:
+                print("♻ ssg/templates.py changed; restarting"); server.server_close()
+                os.execv(sys.executable, [sys.executable, "-m", "ssg", "serve", *(argv if argv is not None else sys.argv[2:])])
+            if "templates" in changed:
+                # Templates/static are fingerprinted into the build manifest: this rebuild is a full one.
+                # They also decide which Bulma classes survive the purge, so the purged CSS is recomputed
+                templates.env.cache_clear(); templates.chrome.cache_clear(); styles.styles.cache_clear()
+            if "content" in changed:
+                styles.styles.cache_clear()     # Markdown bodies can use Bulma classes too
+            _rebuild(pipeline, args, warm, reloader, ", ".join(changed) + " changed")
+    except KeyboardInterrupt:
+        server.shutdown()
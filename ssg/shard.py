@@ -0,0 +1,64 @@
+# ssg/shard.py — sharded builds: stable slug partitions (build.py --shard K/N), partial metadata files, merge CLI
+import sys, json, hashlib, argparse
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+PARTIAL_VERSION = 1
+
+def parse_shard(spec: str) -> tuple:
+    """argparse type for --shard: "2/4" -> (2, 4), shards numbered from 1."""
+    try:
+        k, n = (int(x) for x in spec.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected K/N, got {spec!r}")
+    if not 1 <= k <= n: raise argparse.ArgumentTypeError(f"shard {k} is not in 1..{n}")
+    return k, n
+
+def shard_of(slug: str, n: int) -> int:
+    """1-based shard owning a slug; stable across machines, runs and Python versions."""
+    return int.from_bytes(hashlib.sha256(slug.encode("utf-8")).digest()[:8], "big") % n + 1
+
+def default_partial(shard: tuple) -> Path:
+    return ROOT/".cache"/"shards"/f"shard-{shard[0]}-of-{shard[1]}.json"
+
+def write_partial(path, shard: tuple, config: dict, posts: list, files: list):
+    """
+    posts: [{"order", "meta", "record", "lastmod", "image"}] for this shard's
+    posts; order is the post's position in the unsharded build. files: every
+    path (relative to the site dir) the shard emitted.
+    """
+    path = Path(path); path.parent.mkdir(parents=True, exist_ok=True)
+    data = {"version": PARTIAL_VERSION, "shard": list(shard), "config": config, "posts": posts, "files": sorted(files)}
+    path.write_text(json.dumps(data, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+
+def load_partials(paths) -> dict:
+    """
+    Combine partial files into one {"config", "posts" (build order), "files"}.
+    Exits with a message unless they are N different shards of the same N-way
+    build with the same config.
+    """
+    parts = []
+    for p in paths:
+        data = json.loads(Path(p).read_text(encoding="utf-8"))
+        if data.get("version") != PARTIAL_VERSION: sys.exit(f"✖ {p}: not a shard partial (version {data.get('version')})")
+        parts.append(data)
+    if not parts: sys.exit("✖ merge: no partial files given")
+    n = parts[0]["shard"][1]
+    got = sorted(d["shard"][0] for d in parts)
+    if any(d["shard"][1] != n for d in parts) or got != list(range(1, n + 1)):
+        sys.exit(f"✖ merge: need shards 1..{n} of one {n}-way build exactly once, got {[tuple(d['shard']) for d in parts]}")
+    if any(d["config"] != parts[0]["config"] for d in parts):
+        sys.exit("✖ merge: shards were built with different site options")
+    posts = sorted((post for d in parts for post in d["posts"]), key=lambda post: post["order"])
+    return {"config": parts[0]["config"], "posts": posts, "files": sorted({f for d in parts for f in d["files"]})}
+
+def main(argv=None):
+    """python -m ssg merge PARTIAL... [build.py options]: global pages from every shard's partial."""
+    sys.path.insert(0, str(ROOT))
+    import build as pipeline   # the root build.py
+    ap = pipeline.parser()
+    ap.prog = "python -m ssg merge"
+    ap.add_argument("partials", nargs="+", help="shard-K-of-N.json files written by build.py --shard")
+    args = ap.parse_args(argv)
+    pipeline.merge(args, load_partials(args.partials))
+    return 0
@@ -0,0 +1,81 @@
+# ssg/siteindex.py — one in-memory index of posts_meta shared by every listing generator (buckets from the post store)
+from .postmeta import PostMeta
+
+class SiteIndex:
+    """
+    Built once per build from posts_meta (build order). Holds the category/tag
+    buckets, the sort orders the generators need, counts, a slug cache and a
+    fragment cache, so no generator re-walks posts_meta, re-slugifies the same
+    term or re-renders the same post's card/list markup. Posts are held as
+    PostMeta (dicts are converted), so bucket keys are the interned term names.
+
+    Posts go newest first by published date, build order breaking ties.
+    store: a PostStore scoped to this build (PostStore.scope); the buckets,
+    counts and that order then come from its indexed queries. Without one,
+    published ({slug: date}) orders them, else build order alone does.
+    """
+    def __init__(self, posts_meta, store=None, published=None):
+        from .render import slugify  # render imports this module
+        self._slugify = slugify
+        self.posts = [PostMeta.of(m) for m in posts_meta]
+        if store is not None:
+            by_slug = {m.slug: m for m in self.posts}
+            self.newest = [by_slug[s] for s in store.recent()]
+            # Buckets oldest first, like the build-order ones below
+            self.by_category = {c: [by_slug[s] for s in reversed(store.by_category(c))] for c in store.categories()}
+            self.by_tag = {t: [by_slug[s] for s in reversed(store.by_tag(t))] for t in store.tags()}
+        else:
+            rank = {m.slug: i for i, m in enumerate(self.posts)}
+            dated = sorted(self.posts, key=lambda m: (published.get(m.slug) or "", rank[m.slug])) if published else self.posts
+            self.newest = dated[::-1]
+            self.by_category, self.by_tag = {}, {}
+            for m in dated:
+                self.by_category.setdefault(m.category, []).append(m)
+                for t in m.tags: self.by_tag.setdefault(t, []).append(m)
+        self._slugs, self._fragments = {}, {}
+        self.category_slugs = {c: self.slug(c) for c in self.by_category}
+        self.tag_slugs = {t: self.slug(t) for t in self.by_tag}
+        # Sidebar order: most used first, then name
+        self.category_counts = sorted(((c, len(v)) for c, v in self.by_category.items()), key=lambda x: (-x[1], x[0].lower()))
+        self.tag_counts = sorted(((t, len(v)) for t, v in self.by_tag.items()), key=lambda x: (-x[1], x[0].lower()))
+        self.by_title = sorted(self.posts, key=lambda m: m.title.lower())
+        self.categories_az = sorted(self.by_category, key=str.lower)
+        self.category_names, self.tag_names = sorted(self.by_category), sorted(self.by_tag)
+
+    @classmethod
+    def of(cls, posts):
+        """Accept a SiteIndex or a plain posts_meta list."""
+        return posts if isinstance(posts, cls) else cls(posts)
+
+    def __len__(self):
+        return len(self.posts)
+
+    def __iter__(self):
+        return iter(self.posts)
+
+    def slug(self, term: str) -> str:
+        s = self._slugs.get(term)
+        if s is None:
+            s = self._slugs[term] = self._slugify(term)
+        return s
+
+    def fragment(self, kind: str, m: PostMeta, base_prefix: str, make) -> str:
+        """Markup of one kind ("card", "item", "archive") for post m, made by make(m, base_prefix) once per build."""
+        key = (kind, m.slug, base_prefix)
+        f = self._fragments.get(key)
+        if f is None:
+            f = self._fragments[key] = make(m, base_prefix)
+        return f
+
+    def __getstate__(self):
+        # Pool workers get the index without whatever fragments the parent rendered so far
+        return dict(self.__dict__, _fragments={})
+
+    def newest_in_category(self, cat):
+        return self.by_category.get(cat, [])[::-1]
+
+    def newest_with_tag(self, tag):
+        return self.by_tag.get(tag, [])[::-1]
+
+    def category_az(self, cat):
+        return sorted(self.by_category.get(cat, []), key=lambda m: m.title.lower())
@@ -0,0 +1,67 @@
+# ssg/sitemap.py — streaming sitemap writer: index + numbered child sitemaps, each with a .xml.gz twin
+import gzip
+from pathlib import Path
+from xml.sax.saxutils import escape as xml_escape
+from . import output
+
+# sitemaps.org limits per file: 50,000 URLs and 50 MiB uncompressed
+MAX_URLS = 50000
+MAX_BYTES = 50 * 1024 * 1024
+NS = "http://www.sitemaps.org/schemas/sitemap/0.9"
+_HEAD = f'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="{NS}">\n'.encode("utf-8")
+_TAIL = b"</urlset>\n"
+
+class SitemapWriter:
+    """
+    Streams <url> entries for one kind (posts, categories, ...) into
+    sitemap-<kind>-<n>.xml, rolling over to the next file before either limit
+    is hit. Each file is written alongside a precompressed .xml.gz.
+    """
+    def __init__(self, root: Path, site_url: str, kind: str, max_urls=MAX_URLS, max_bytes=MAX_BYTES):
+        self.root, self.site_url, self.kind = Path(root), site_url.rstrip("/"), kind
+        self.max_urls, self.max_bytes = max_urls, max_bytes
+        self.files = []          # [(filename, newest lastmod or None)]
+        self._fh = self._gz = None
+
+    def _open(self):
+        name = f"sitemap-{self.kind}-{len(self.files) + 1}.xml"
+        # Streamed to temp files; output.replace() only swaps them in when the bytes changed
+        self._fh = open(self.root/f".{name}.tmp", "wb")
+        # mtime=0 keeps the .gz byte-identical across builds
+        self._gz = gzip.GzipFile(filename="", mode="wb", fileobj=open(self.root/f".{name}.gz.tmp", "wb"), mtime=0)
+        self._write(_HEAD)
+        self.files.append([name, None]); self._urls, self._bytes = 0, len(_HEAD)
+
+    def _write(self, blob: bytes):
+        self._fh.write(blob); self._gz.write(blob)
+
+    def _close(self):
+        if self._fh is None: return
+        self._write(_TAIL); self._fh.close()
+        fileobj = self._gz.fileobj; self._gz.close(); fileobj.close()
+        self._fh = self._gz = None
+        name = self.files[-1][0]
+        output.replace(self.root/f".{name}.tmp", self.root/name); output.replace(self.root/f".{name}.gz.tmp", self.root/f"{name}.gz")
+
+    def add(self, loc: str, lastmod: str = None):
+        entry = f"  <url><loc>{xml_escape(loc)}</loc>" + (f"<lastmod>{lastmod}</lastmod>" if lastmod else "") + "</url>\n"
+        blob = entry.encode("utf-8")
+        if self._fh is not None and (self._urls >= self.max_urls or self._bytes + len(blob) + len(_TAIL) > self.max_bytes):
+            self._close()
+        if self._fh is None: self._open()
+        self._write(blob); self._urls += 1; self._bytes += len(blob)
+        if lastmod and (self.files[-1][1] is None or lastmod > self.files[-1][1]): self.files[-1][1] = lastmod
+
+    def close(self):
+        self._close()
+        return self.files
+
+def write_sitemap_index(root: Path, site_url: str, files):
+    """sitemap.xml (+ .gz) listing every child sitemap with its newest lastmod."""
+    site_url = site_url.rstrip("/")
+    out = ['<?xml version="1.0" encoding="UTF-8"?>', f'<sitemapindex xmlns="{NS}">']
+    for name, lastmod in files:
+        out.append(f"  <sitemap><loc>{xml_escape(site_url)}/{name}</loc>" + (f"<lastmod>{lastmod}</lastmod>" if lastmod else "") + "</sitemap>")
+    blob = ("\n".join(out + ["</sitemapindex>\n"])).encode("utf-8")
+    output.write(Path(root)/"sitemap.xml", blob)
+    output.write(Path(root)/"sitemap.xml.gz", gzip.compress(blob, mtime=0))
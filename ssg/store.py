@@ -0,0 +1,153 @@
+# ssg/store.py — persistent post store (data/posts.db, SQLite): payloads + listing fields, queried by keyword/category/tag/date
+import json, sqlite3, hashlib, datetime
+from pathlib import Path
+from .content import _stub_post
+
+ROOT = Path(__file__).resolve().parents[1]
+DB_PATH = ROOT/"data"/"posts.db"
+SCHEMA_VERSION = 3
+BATCH = 500             # host parameters per IN (...) query
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    keyword   TEXT PRIMARY KEY,     -- the keyword; content/posts path for Markdown posts
+    slug      TEXT NOT NULL,
+    title     TEXT NOT NULL,
+    category  TEXT NOT NULL,
+    tags      TEXT NOT NULL,        -- JSON list (post_tags has one row per tag for lookups)
+    payload   TEXT NOT NULL,        -- the generated content dict, JSON
+    record    TEXT NOT NULL,        -- search/feed fields (post_record minus published), JSON
+    hash      TEXT NOT NULL,        -- sha256 of payload
+    published TEXT NOT NULL,        -- first published (ISO date); set_dates() keeps it in step with the build manifest
+    updated   TEXT NOT NULL,        -- last payload change (ISO date)
+    source    TEXT NOT NULL         -- "model" (API output), "stub" (no API key; regenerated once there is one), "markdown"
+);
+CREATE TABLE IF NOT EXISTS post_tags (keyword TEXT NOT NULL, tag TEXT NOT NULL, PRIMARY KEY (keyword, tag));
+CREATE INDEX IF NOT EXISTS posts_slug ON posts(slug);
+CREATE INDEX IF NOT EXISTS posts_category ON posts(category, published);
+CREATE INDEX IF NOT EXISTS posts_published ON posts(published);
+CREATE INDEX IF NOT EXISTS post_tags_tag ON post_tags(tag);
+CREATE TEMP TABLE IF NOT EXISTS build_posts (keyword TEXT PRIMARY KEY, ord INTEGER NOT NULL);
+"""
+# v1 -> v2: adds posts.source (stub rows found by hash); v3 restores post_tags and the indexes v2 dropped
+_V1_TO_V2 = "ALTER TABLE posts ADD COLUMN source TEXT NOT NULL DEFAULT 'model';"
+# Listing queries see the posts of the current build only (scope()); ties on date go to the later one in build order
+_SCOPED = "posts p JOIN build_posts b ON b.keyword = p.keyword"
+_TAGGED = "post_tags t JOIN posts p ON p.keyword = t.keyword JOIN build_posts b ON b.keyword = p.keyword"
+_NEWEST = "ORDER BY p.published DESC, b.ord DESC"
+_META = "keyword, slug, title, category, tags, record, hash, published, updated"
+
+def content_hash(data: dict) -> str:
+    return hashlib.sha256(json.dumps(data, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+def _row(r) -> dict:
+    keyword, slug, title, category, tags, record, h, published, updated = r
+    return {"keyword": keyword, "slug": slug, "title": title, "category": category, "tags": json.loads(tags),
+            "record": json.loads(record), "hash": h, "published": published, "updated": updated}
+
+class PostStore:
+    """
+    One row per generated keyword or Markdown post. Builds read the light
+    listing columns for every post and the payload only for posts they
+    re-render; generation only runs for keywords with no row, or with a stub
+    row once an API key is set. Listing pages ask the indexed category / tag /
+    date queries, limited to the posts scope() was given.
+    """
+    def __init__(self, path=DB_PATH):
+        self.path = Path(path); self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(self.path)
+        self.db.execute("PRAGMA journal_mode=WAL"); self.db.execute("PRAGMA synchronous=NORMAL")
+        version = self.db.execute("PRAGMA user_version").fetchone()[0]
+        if version == 1:
+            # Keep v1 rows (and their published dates); mark the ones that hold the no-API-key stub
+            with self.db:
+                self.db.executescript(_V1_TO_V2)
+                stubs = [(kw,) for kw, h in self.db.execute("SELECT keyword, hash FROM posts") if h == content_hash(_stub_post(kw))]
+                self.db.executemany("UPDATE posts SET source = 'stub' WHERE keyword = ?", stubs)
+        elif version not in (2, SCHEMA_VERSION):
+            self.db.executescript("DROP TABLE IF EXISTS posts; DROP TABLE IF EXISTS post_tags;")
+        self.db.executescript(_SCHEMA)
+        if version in (1, 2):
+            # v2 had no post_tags: refill it from the tags column
+            with self.db:
+                self.db.executemany("INSERT OR IGNORE INTO post_tags (keyword, tag) VALUES (?, ?)",
+                                    [(kw, t) for kw, tags in self.db.execute("SELECT keyword, tags FROM posts").fetchall() for t in json.loads(tags)])
+        self.db.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    def _select(self, columns: str, keywords) -> list:
+        keywords, out = list(keywords), []
+        for i in range(0, len(keywords), BATCH):
+            part = keywords[i:i + BATCH]
+            out += self.db.execute(f"SELECT {columns} FROM posts WHERE keyword IN ({','.join('?' * len(part))})", part).fetchall()
+        return out
+
+    def known(self, keywords, stubs: bool = True) -> set:
+        """Keywords with a row; stubs=False leaves out rows holding stub content (so they get regenerated)."""
+        rows = self._select("keyword, source", keywords)
+        return {kw for kw, source in rows if stubs or source != "stub"}
+
+    def rows(self, keywords) -> dict:
+        """{keyword: listing fields + record + hash + dates} without the payloads."""
+        return {r[0]: _row(r) for r in self._select(_META, keywords)}
+
+    def payloads(self, keywords) -> dict:
+        """{keyword: generated content dict}, only for the posts a build re-renders."""
+        return {r[0]: json.loads(r[1]) for r in self._select("keyword, payload", keywords)}
+
+    def put(self, entries):
+        """
+        entries: [(keyword, slug, title, category, tags, payload, record, source)].
+        New rows are published today; updated only moves when the payload
+        changed, so a stub replaced by real content keeps its published date.
+        """
+        today = datetime.date.today().isoformat()
+        rows = [(kw, slug, title, category, json.dumps(tags, ensure_ascii=False), json.dumps(payload, ensure_ascii=False),
+                 json.dumps(record, ensure_ascii=False), content_hash(payload), today, today, source)
+                for kw, slug, title, category, tags, payload, record, source in entries]
+        with self.db:
+            self.db.executemany(
+                "INSERT INTO posts (keyword, slug, title, category, tags, payload, record, hash, published, updated, source) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT(keyword) DO UPDATE SET "
+                "slug = excluded.slug, title = excluded.title, category = excluded.category, tags = excluded.tags, "
+                "payload = excluded.payload, record = excluded.record, source = excluded.source, "
+                "updated = CASE WHEN posts.hash = excluded.hash THEN posts.updated ELSE excluded.updated END, hash = excluded.hash",
+                rows)
+            self.db.executemany("DELETE FROM post_tags WHERE keyword = ?", [(e[0],) for e in entries])
+            self.db.executemany("INSERT OR IGNORE INTO post_tags (keyword, tag) VALUES (?, ?)",
+                                [(e[0], t) for e in entries for t in e[4]])
+
+    def set_dates(self, dates: dict):
+        """{keyword: (published, updated)}: the dates the build settled on (build manifest), where they differ."""
+        with self.db:
+            self.db.executemany("UPDATE posts SET published = ?, updated = ? WHERE keyword = ? AND (published != ? OR updated != ?)",
+                                [(p, u, kw, p, u) for kw, (p, u) in dates.items()])
+
+    def scope(self, keywords):
+        """The posts of this build, in build order; the listing queries below only see these."""
+        with self.db:
+            self.db.execute("DELETE FROM build_posts")
+            self.db.executemany("INSERT OR IGNORE INTO build_posts (keyword, ord) VALUES (?, ?)", ((kw, i) for i, kw in enumerate(keywords)))
+
+    def recent(self, limit: int = -1) -> list:
+        """Slugs, newest first (all of them by default)."""
+        return [r[0] for r in self.db.execute(f"SELECT p.slug FROM {_SCOPED} {_NEWEST} LIMIT ?", (limit,))]
+
+    def categories(self) -> dict:
+        """{category: post count}."""
+        return dict(self.db.execute(f"SELECT p.category, COUNT(*) FROM {_SCOPED} GROUP BY p.category"))
+
+    def tags(self) -> dict:
+        """{tag: post count}."""
+        return dict(self.db.execute(f"SELECT t.tag, COUNT(*) FROM {_TAGGED} GROUP BY t.tag"))
+
+    def by_category(self, category: str) -> list:
+        """Slugs, newest first."""
+        return [r[0] for r in self.db.execute(f"SELECT p.slug FROM {_SCOPED} WHERE p.category = ? {_NEWEST}", (category,))]
+
+    def by_tag(self, tag: str) -> list:
+        """Slugs, newest first."""
+        return [r[0] for r in self.db.execute(
+            f"SELECT p.slug FROM {_TAGGED} WHERE t.tag = ? {_NEWEST}", (tag,))]
+
+    def close(self):
+        self.db.close()
@@ -0,0 +1,98 @@
+# ssg/styles.py — Bulma purged to the classes the site can emit: inline critical CSS per page type + one async stylesheet
+import re, hashlib
+from functools import lru_cache
+from pathlib import Path
+from markupsafe import Markup
+
+ROOT = Path(__file__).resolve().parents[1]
+VENDOR_DIR = ROOT/"vendor"/"bulma"
+BULMA = VENDOR_DIR/"bulma-0.9.3.min.css"          # vendored: builds never fetch CSS
+SHEET = "css/bulma.css"                             # logical asset name of the purged stylesheet
+# Everything that can put a class attribute into a page: templates, the Python that renders markup, client JS and
+# Markdown bodies (raw HTML, {: .class } attribute lists). Generated post text is always escaped, so it cannot
+SOURCES = (("templates", "**/*.html"), ("ssg", "*.py"), ("static/js", "*.js"), ("content/posts", "**/*.md"))
+FOLD_MARK = "{# fold #}"                            # a template's text after this is below the fold
+# Above-the-fold templates per page type (base.html's {% block critical %} picks the type)
+FOLD = {
+    "post": ("partials/navbar_brand.html", "post.html"),
+    "index": ("partials/navbar.html", "partials/search.html", "index.html"),
+    "page": ("partials/navbar_brand.html", "page.html", "category.html", "tag.html", "pages/*.html"),
+    "404": ("404.html",),
+}
+# Classes render.py puts above the fold (homepage cards) plus theme["container_open"]
+FOLD_EXTRA = {"index": "column is-half card card-image card-content image tags tag is-info is-link is-light title is-5 button is-small"}
+ALWAYS = "section container"
+
+_WORDS = re.compile(r"[A-Za-z0-9_-]+")
+_CLASS = re.compile(r"\.(-?[_a-zA-Z][\w-]*)")
+_NOT = re.compile(r":not\([^()]*\)")
+_KEYFRAMES = re.compile(r"@(?:-webkit-)?keyframes\s+([\w-]+)")
+_JINJA = re.compile(r"\{\{.*?\}\}|\{%.*?%\}|\{#.*?#\}", re.S)
+
+def _blocks(css: str):
+    """Top-level (prelude, body) pairs of a stylesheet; at-statements without a block (@charset) are dropped."""
+    i, n = 0, len(css)
+    while i < n:
+        j = css.find("{", i)
+        if j < 0: return
+        prelude = css[i:j].rsplit(";", 1)[-1].strip()
+        depth, k = 1, j + 1
+        while depth and k < n:
+            depth += {"{": 1, "}": -1}.get(css[k], 0); k += 1
+        yield prelude, css[j + 1:k - 1]; i = k
+
+def _split(selectors: str) -> list:
+    """Comma-separated selector list, commas inside parentheses kept."""
+    out, depth, start = [], 0, 0
+    for i, c in enumerate(selectors):
+        depth += (c == "(") - (c == ")")
+        if c == "," and not depth: out.append(selectors[start:i]); start = i + 1
+    return out + [selectors[start:]]
+
+def purge(css: str, used: set) -> str:
+    """
+    Rules of css whose selectors only name classes in used (selectors without
+    classes, and classes inside :not(), always match); @media/@supports keep
+    their surviving rules, @keyframes survive when a kept rule names them.
+    """
+    out = []
+    for prelude, body in _blocks(css):
+        if prelude.startswith(("@media", "@supports")):
+            inner = purge(body, used)
+            if inner: out.append(f"{prelude}{{{inner}}}")
+        elif prelude.startswith("@"):
+            out.append(f"{prelude}{{{body}}}")
+        else:
+            keep = [s for s in _split(prelude) if set(_CLASS.findall(_NOT.sub("", s))) <= used]
+            if keep: out.append(f"{','.join(keep)}{{{body}}}")
+    kept = "".join(r for r in out if not _KEYFRAMES.match(r))
+    return "".join(r for r in out if not _KEYFRAMES.match(r) or _KEYFRAMES.match(r).group(1) in kept)
+
+def _fold_text(pattern: str) -> str:
+    """Markup before FOLD_MARK in the matching templates, Jinja tags removed ({{ pagination }} is not a class)."""
+    return "".join(_JINJA.sub(" ", p.read_text(encoding="utf-8").split(FOLD_MARK)[0]) for p in sorted((ROOT/"templates").glob(pattern)))
+
+@lru_cache(maxsize=None)
+def styles() -> dict:
+    """
+    {"sheet": purged stylesheet, "critical": {page type: inline CSS}, "hash"}.
+    Class names are every word of SOURCES (a superset of what reaches the HTML),
+    so this runs before any page renders and is the same in every worker.
+    """
+    bulma = BULMA.read_text(encoding="utf-8")
+    used = {w for base, pattern in SOURCES for p in sorted((ROOT/base).glob(pattern)) for w in _WORDS.findall(p.read_text(encoding="utf-8"))}
+    sheet = purge(bulma, used)
+    critical = {}
+    for kind, templates in FOLD.items():
+        words = " ".join([ALWAYS, FOLD_EXTRA.get(kind, "")] + [_fold_text(t) for t in templates])
+        critical[kind] = purge(sheet, set(_WORDS.findall(words)))
+    h = hashlib.sha256((sheet + "".join(critical[k] for k in sorted(critical))).encode("utf-8")).hexdigest()
+    return {"sheet": sheet, "critical": critical, "hash": h}
+
+def critical_css(kind: str, base_prefix: str = "") -> Markup:
+    """Template global: the page type's critical rules inline, the full purged sheet loaded without blocking render."""
+    from .assets import asset
+    href = f"{base_prefix}{asset(SHEET)}"
+    return Markup(f"<style>{styles()['critical'][kind]}</style>\n"
+                  f'<link rel="preload" href="{href}" as="style" onload="this.onload=null;this.rel=\'stylesheet\'">\n'
+                  f'<noscript><link rel="stylesheet" href="{href}"></noscript>')
@@ -1,7 +1,7 @@
 # ssg/themes.py — minimal theme registry
 THEMES = {
     "bulma": {
-        "css": "https://cdnjs.cloudflare.com/ajax/libs/bulma/0.9.4/css/bulma.min.css",
+        # Stylesheet: vendored Bulma, purged + inlined per page type by ssg/styles.py
         "container_open": "<section class='section'><div class='container'>",
         "container_close": "</div></section>",
     }
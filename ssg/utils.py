@@ -16,28 +16,25 @@ def slugify(text: str) -> str:
 def build_stamp() -> str:
     return datetime.datetime.utcnow().strftime("%Y-%m-%dT%H:%MZ")
 
+# Raw-text/whitespace-sensitive elements are swapped for private-use sentinels while the rest is collapsed
+_KEEP = re.compile(r"<(pre|textarea|script|style)\b[\s\S]*?</\1\s*>", re.IGNORECASE)
+_SENTINEL = re.compile("\ue000(\\d+)\ue001")
+_COMMENT = re.compile(r"<!--(?!\[if)[\s\S]*?-->")
+_SPACE = re.compile(r"\s+")
+# Whitespace next to block-level tags never renders, so it can go entirely
+_BLOCK = re.compile(r"\s*(</?(?:html|head|body|meta|link|title|base|div|section|article|aside|nav|header|footer|main|figure|"
+                    r"h[1-6]|p|ul|ol|li|table|thead|tbody|tr|td|th|form|hr|br|picture|source|!doctype)\b[^>]*>)\s*", re.IGNORECASE)
+
 def minify_html(html_str: str) -> str:
-    import re
-    preserved = {}
-    i = 0
-    def keep(tag, s):
-        nonlocal i
-        pat = re.compile(fr"<{tag}[\s\S]*?</{tag}>", re.IGNORECASE)
-        def repl(m):
-            nonlocal i
-            key = f"Â§Â§KEEP{i}Â§Â§"
-            preserved[key] = m.group(0)
-            i += 1
-            return key
-        return pat.sub(repl, s)
-    s = html_str
-    for tag in ["pre","code","script","style"]:
-        s = keep(tag, s)
-    s = re.sub(r">\s+<", "><", s)
-    s = re.sub(r"\s{2,}", " ", s)
-    for k,v in preserved.items():
-        s = s.replace(k, v)
-    return s
+    """Collapse insignificant whitespace and comments; <pre>/<textarea>/<script>/<style> pass through untouched."""
+    kept = []
+    def keep(m):
+        kept.append(m.group(0)); return f"\ue000{len(kept) - 1}\ue001"
+    s = _KEEP.sub(keep, html_str)
+    s = _COMMENT.sub("", s)
+    s = _SPACE.sub(lambda m: "\n" if "\n" in m.group(0) else " ", s)
+    s = _BLOCK.sub(r"\1", s)
+    return _SENTINEL.sub(lambda m: kept[int(m.group(1))], s)
 
 def jsonld(data: dict) -> str:
     return '<script type="application/ld+json">' + json.dumps(data, ensure_ascii=False, default=str) + "</script>\n"
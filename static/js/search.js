@@ -0,0 +1,37 @@
+// Client search over site/search/ (built by ssg/search.py). Loads meta.json on first use, then only
+// the term shards (t/<prefix>.json) for the typed terms and the doc shards (d/<n>.json) of the top hits.
+// The site base path comes from the script tag's data-base attribute; tokens() mirrors ssg.search.tokenize.
+(function(){
+  const prefix=(document.currentScript&&document.currentScript.dataset.base)||'';
+  const q=document.getElementById('q'), btn=document.getElementById('qbtn'), out=document.getElementById('qresults');
+  if(!q||!out) return;
+  const base=prefix+'/search/', cache=new Map(); let meta=null, seq=0, timer=null;
+  const get=u=>{ if(!cache.has(u)) cache.set(u, fetch(base+u).then(r=>r.ok?r.json():null).catch(()=>null)); return cache.get(u); };
+  const esc=s=>String(s).replace(/[&<>"']/g,c=>({'&':'&amp;','<':'&lt;','>':'&gt;','"':'&quot;',"'":'&#39;'}[c]));
+  const stop=new Set('a an and are as at be by for from how in is it of on or the to vs what when which who why with'.split(' '));
+  const tokens=s=>s.normalize('NFKD').replace(/[\u0300-\u036f]/g,'').toLowerCase().split(/[^a-z0-9]+/).filter(t=>t.length>1&&!stop.has(t));
+  async function run(){
+    const my=++seq, terms=[...new Set(tokens(q.value||''))]; if(!terms.length){out.innerHTML='';return;}
+    if(!meta){ meta=await get('meta.json'); if(!meta) return; meta.keys=new Set(meta.shards); }
+    const scores=new Map(), hits=new Map();
+    await Promise.all(terms.map(async t=>{
+      const key=t.slice(0,meta.prefix); if(!meta.keys.has(key)) return;
+      const shard=await get('t/'+key+'.json')||{}, best=new Map();
+      for(const term in shard){
+        if(!term.startsWith(t)) continue;
+        const f=term===t?1:0.5*t.length/term.length;   // exact match beats prefix completion
+        for(const [d,w] of shard[term]) if(w*f>(best.get(d)||0)) best.set(d,w*f);
+      }
+      for(const [d,s] of best){ scores.set(d,(scores.get(d)||0)+s); hits.set(d,(hits.get(d)||0)+1); }
+    }));
+    const top=[...scores].map(([d,s])=>[d,s*hits.get(d)/terms.length]).sort((a,b)=>b[1]-a[1]).slice(0,20);
+    const docs=(await Promise.all(top.map(([d])=>get('d/'+Math.floor(d/meta.doc_shard)+'.json').then(c=>c&&c[d%meta.doc_shard])))).filter(Boolean);
+    if(my!==seq) return;
+    out.innerHTML = docs.length ? '<ul>'+docs.map(([slug,title,cat])=>`<li><a href="${prefix}/posts/${slug}/">${esc(title)}</a> <span class="tag is-light">${esc(cat)}</span></li>`).join('')+'</ul>' : '<p><em>No results</em></p>';
+    if(window.SS_trackSearch) window.SS_trackSearch(q.value);
+  }
+  if(btn) btn.addEventListener('click',run);
+  q.addEventListener('keydown',e=>{if(e.key==='Enter') run();});
+  q.addEventListener('input',()=>{clearTimeout(timer); timer=setTimeout(run,200);});
+  const init=new URLSearchParams(location.search).get('q'); if(init){q.value=init; run();}
+})();
@@ -0,0 +1 @@
+window.SS_trackSearch=function(q){console.log('search',q)};
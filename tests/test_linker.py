@@ -0,0 +1,40 @@
+# tests/test_linker.py — auto-link matching and write_post's recorded link targets (python -m pytest)
+from ssg import output
+from ssg.assets import build_assets
+from ssg.content import _stub_post
+from ssg.linker import Linker, MAX_LINKS, use_linker
+from ssg.postmeta import PostMeta
+from ssg.render import write_post
+from ssg.themes import THEMES
+
+TARGETS = [("best air fryer", "best-air-fryer"), ("air fryer", "air-fryer"), ("air fryer recipes", "air-fryer-recipes"),
+           ("convection oven", "convection-oven"), ("toaster oven", "toaster-oven")]
+
+def test_leftmost_longest_whole_words():
+    spans = Linker(TARGETS).matches("The Best Air Fryer recipes beat a convection ovens test.")
+    assert [slug for _, _, slug in spans] == ["best-air-fryer"]
+
+def test_skipped_slug_falls_back_to_shorter_phrase():
+    skip = {"air-fryer-recipes"}
+    text = "Try air fryer recipes tonight."
+    spans = Linker(TARGETS).matches(text, skip=skip)
+    assert [(text[s:e], slug) for s, e, slug in spans] == [("air fryer", "air-fryer")]
+    assert skip == {"air-fryer-recipes", "air-fryer"}
+
+def test_write_post_records_links_with_related_list(tmp_path):
+    output.set_site_dir(tmp_path); output.reset(); build_assets()
+    payloads = [{"keyword": kw, "slug": slug, "data": _stub_post(kw), "title": kw.title(), "category": "Kitchen", "tags": ["cooking"],
+                 "author_name": "", "author_url": "", "author_bio": ""} for kw, slug in TARGETS]
+    page = payloads[1]
+    page["data"]["sections"][0]["paragraphs"].append(
+        "Air fryer recipes, a toaster oven, a convection oven, the best air fryer, and another toaster oven.")
+    related = [PostMeta.of(p) for p in payloads if p is not page]
+    use_linker(Linker((p["keyword"], p["slug"]) for p in payloads))
+    try:
+        rec = write_post("Blog", "https://u.github.io/site", "/site", page, "tag-20", THEMES["bulma"], related, "")
+    finally:
+        use_linker(None)
+    assert rec["links"] == ["air-fryer-recipes", "toaster-oven", "convection-oven", "best-air-fryer"]
+    assert page["slug"] not in rec["links"] and len(rec["links"]) <= MAX_LINKS
+    html = (tmp_path/"posts"/page["slug"]/"index.html").read_text(encoding="utf-8")
+    assert 'href="/site/posts/toaster-oven/">toaster oven</a>' in html and "Related:" in html